@@ -1,19 +1,34 @@
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
 from bson import ObjectId
+from bson.errors import InvalidId
 from accounts.models import UserProfile
-from mongoengine.errors import DoesNotExist
+from accounts.user_cache import user_cache
 
 class MongoEngineJWTAuthentication(JWTAuthentication):
+    """
+    Verifies the access token once per request and resolves its user through
+    the short-TTL user cache, so views can rely on ``request.user``.
+    """
+
     def get_user(self, validated_token):
         user_id = validated_token.get("user_id")
-
         if not user_id:
-            return None
+            raise AuthenticationFailed("Token contained no recognizable user identification", code="token_not_valid")
+
+        user_id = str(user_id)
+        snapshot = user_cache.get(user_id)
+        if snapshot is not None:
+            user = UserProfile.from_json(snapshot, created=False)
+        else:
+            try:
+                user = UserProfile.objects(id=ObjectId(user_id)).first()
+            except InvalidId:
+                user = None
+            if user is None:
+                raise AuthenticationFailed("User not found", code="user_not_found")
+            user_cache.set(user_id, user.to_json())
 
-        try:
-            return UserProfile.objects.get(id=ObjectId(user_id))
-        except DoesNotExist:
-            return None
-        except Exception:
-            return None
-    
\ No newline at end of file
+        if not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        return user
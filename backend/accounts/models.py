@@ -5,6 +5,8 @@ from mongoengine import Document, StringField, EmailField, DateTimeField, Boolea
 from django.contrib.auth.hashers import make_password, check_password
 from datetime import datetime
 
+from .user_cache import invalidate_user
+
 class UserProfile(Document):
     """
     Custom user model using MongoDB
@@ -28,6 +30,16 @@ class UserProfile(Document):
         'indexes': ['email', 'date_joined']
     }
     
+    def save(self, *args, **kwargs):
+        """Save and drop the cached copy used by request authentication"""
+        result = super().save(*args, **kwargs)
+        invalidate_user(self.pk)
+        return result
+
+    def delete(self, *args, **kwargs):
+        invalidate_user(self.pk)
+        return super().delete(*args, **kwargs)
+
     def set_password(self, raw_password):
         """Set password with Django's password hashing"""
         self.password_hash = make_password(raw_password)
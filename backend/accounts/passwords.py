@@ -0,0 +1,84 @@
+"""
+Password verification on a bounded worker pool
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+
+from .user_cache import invalidate_user
+
+logger = logging.getLogger(__name__)
+
+
+class LoginBusy(Exception):
+    """Too many password checks are already queued in this process"""
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_slots = None
+# A real hash from the configured hasher, checked for unknown emails so they
+# cost the same as a wrong password on every Django version
+_DUMMY_HASH = make_password('login-timing-dummy-password')
+
+
+def get_pool():
+    """
+    Hash checks run here instead of on the request thread. PBKDF2 releases
+    the GIL, so the workers use separate cores; the pool size caps how much
+    CPU logins can take from other requests.
+    """
+    global _pool, _slots
+    with _pool_lock:
+        if _pool is None:
+            workers = getattr(settings, 'LOGIN_HASH_WORKERS', 4)
+            _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='login-hash')
+            _slots = threading.BoundedSemaphore(workers + getattr(settings, 'LOGIN_HASH_MAX_PENDING', 32))
+        return _pool
+
+
+def _hash_upgrader(user):
+    """check_password setter: store a hash made with the current hasher parameters"""
+    def setter(raw_password):
+        from .models import UserProfile
+
+        user.password_hash = make_password(raw_password)
+        UserProfile.objects(id=user.id).update_one(set__password_hash=user.password_hash)
+        invalidate_user(user.id)
+        logger.info(f"Upgraded password hash for user {user.id}")
+    return setter
+
+
+def _verify(user, raw_password):
+    if user is None:
+        # Hash anyway so unknown emails take as long as wrong passwords
+        check_password(raw_password, _DUMMY_HASH)
+        return False
+    return check_password(raw_password, user.password_hash, setter=_hash_upgrader(user))
+
+
+def verify_password(user, raw_password):
+    """
+    Check ``raw_password`` for ``user`` (which may be None) on the hash pool,
+    upgrading the stored hash when the hasher parameters changed. Raises
+    LoginBusy when the pool's queue is full or the check times out.
+    """
+    pool = get_pool()
+    if not _slots.acquire(blocking=False):
+        raise LoginBusy("Too many concurrent logins")
+    try:
+        future = pool.submit(_verify, user, raw_password)
+    except Exception:
+        _slots.release()
+        raise
+    # The slot is held until the hash job finishes, not until we stop waiting
+    future.add_done_callback(lambda _: _slots.release())
+    timeout = getattr(settings, 'LOGIN_HASH_TIMEOUT', 10)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        logger.warning(f"Password check did not finish within {timeout}s")
+        raise LoginBusy("Password check timed out")
@@ -4,6 +4,7 @@ Serializers for user accounts
 from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
 from .models import UserProfile
+from .passwords import verify_password
 import re
 
 class UserRegistrationSerializer(serializers.Serializer):
@@ -90,7 +91,8 @@ class LoginSerializer(serializers.Serializer):
         
         if email and password:
             user = UserProfile.objects(email=email).first()
-            if not user or not user.check_password(password):
+            # Raises LoginBusy when the hash pool is saturated
+            if not verify_password(user, password):
                 raise serializers.ValidationError("Invalid email or password.")
             
             if not user.is_active:
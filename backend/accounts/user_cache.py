@@ -0,0 +1,20 @@
+"""
+Short-lived per-process cache of authenticated users
+"""
+from django.conf import settings
+
+from backend.cache import LRUCache
+
+# Entries are JSON snapshots (UserProfile.to_json), so every hit builds a
+# fresh document and concurrent requests never share one instance. They are
+# invalidated when a profile is saved or deleted in this process; the TTL
+# bounds how long other workers can serve a stale profile
+user_cache = LRUCache(
+    max_size=getattr(settings, 'USER_CACHE_SIZE', 1024),
+    ttl=getattr(settings, 'USER_CACHE_TTL', 60),
+)
+
+
+def invalidate_user(user_id):
+    if user_id is not None:
+        user_cache.delete(str(user_id))
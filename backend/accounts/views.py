@@ -10,6 +10,8 @@ from django.contrib.auth import authenticate
 from datetime import datetime
 
 from .models import UserProfile
+from .passwords import LoginBusy
+from .user_cache import invalidate_user
 from .serializers import UserRegistrationSerializer, UserProfileSerializer, LoginSerializer
 
 @api_view(['POST'])
@@ -45,24 +47,28 @@ def register_view(request):
 @permission_classes([AllowAny])
 def login_view(request):
     """User login endpoint"""
-    print("🔍 Incoming Login Request Data:", request.data)
-
     serializer = LoginSerializer(data=request.data)
+    try:
+        is_valid = serializer.is_valid()
+    except LoginBusy:
+        return Response(
+            {'error': 'Too many login attempts right now. Please try again.'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
 
-    if serializer.is_valid():
+    if is_valid:
         user = serializer.validated_data['user']
 
-        # Update last login timestamp
+        # Update last login timestamp without rewriting the whole document
         user.last_login = datetime.utcnow()
-        user.save()
+        UserProfile.objects(id=user.id).update_one(set__last_login=user.last_login)
+        invalidate_user(user.id)
 
         # Generate JWT tokens
         refresh = RefreshToken()
         refresh['user_id'] = str(user.id)
         refresh['email'] = user.email
 
-        print("✅ Login successful for:", user.email)
-
         return Response({
             'message': 'Login successful',
             'user': {
@@ -77,8 +83,6 @@ def login_view(request):
             }
         }, status=status.HTTP_200_OK)
 
-    # ❌ Invalid credentials or invalid input
-    print("❌ Serializer validation failed:", serializer.errors)
     return Response({
         "error": "Login failed",
         "details": serializer.errors
@@ -102,39 +106,14 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
     permission_classes = [IsAuthenticated]
     
     def get_object(self):
-        """Get current user profile"""
-        user_id = self.request.user.id if hasattr(self.request.user, 'id') else None
-        if user_id:
-            return UserProfile.objects(id=user_id).first()
-        return None
-    
-    def get(self, request, *args, **kwargs):
-        """Get user profile"""
-        # For JWT authentication, extract user from token
-        auth_header = request.META.get('HTTP_AUTHORIZATION', '')
-        if auth_header.startswith('Bearer '):
-            try:
-                from rest_framework_simplejwt.tokens import UntypedToken
-                from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
-                import jwt
-                from django.conf import settings
-                
-                token = auth_header.split(' ')[1]
-                try:
-                    UntypedToken(token)
-                    decoded = jwt.decode(token, options={"verify_signature": False})
-                    user_id = decoded.get('user_id')
-                    user = UserProfile.objects(id=user_id).first()
-                    
-                    if user:
-                        serializer = self.get_serializer(user)
-                        return Response(serializer.data)
-                except (InvalidToken, TokenError):
-                    pass
-            except Exception:
-                pass
-        
-        return Response({'error': 'Authentication required'}, status=status.HTTP_401_UNAUTHORIZED)
+        """
+        Current user profile. Reads use the user resolved by authentication;
+        updates load a fresh document so a failed update never touches the
+        cached instance shared with other requests.
+        """
+        if self.request.method in ('GET', 'HEAD', 'OPTIONS'):
+            return self.request.user
+        return UserProfile.objects(id=self.request.user.id).first()
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -0,0 +1,179 @@
+"""
+Bounded in-process LRU cache with an optional shared Redis tier
+"""
+import copy
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_redis_clients = {}
+_redis_lock = threading.Lock()
+
+
+def get_redis_client(url=None):
+    """Shared Redis client for ``url`` (defaults to REDIS_URL), or None when unavailable"""
+    url = url if url is not None else getattr(settings, 'REDIS_URL', '')
+    if not url:
+        return None
+    with _redis_lock:
+        if url not in _redis_clients:
+            try:
+                import redis
+                _redis_clients[url] = redis.Redis.from_url(url, socket_timeout=0.25, socket_connect_timeout=0.25)
+            except ImportError:
+                logger.warning("redis package not installed, Redis cache tier disabled")
+                _redis_clients[url] = None
+        return _redis_clients[url]
+
+
+class LRUCache:
+    """Thread-safe, size-bounded LRU with optional per-entry TTL"""
+
+    def __init__(self, max_size=1024, ttl=None):
+        self.max_size = max(1, max_size)
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        ttl = ttl if ttl is not None else self.ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0,
+            }
+
+
+class TieredCache:
+    """
+    In-process LRU in front of an optional Redis tier. Values must be JSON
+    serialisable. Redis errors are logged and treated as misses so the cache
+    never fails a request. The local tier stores and returns copies, so
+    callers may mutate what they get without corrupting the cached entry.
+    """
+
+    def __init__(self, namespace, max_size=1024, ttl=None, redis_url=None):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.local = LRUCache(max_size=max_size, ttl=ttl)
+        self.redis_url = redis_url
+        self._lock = threading.Lock()
+        self.redis_hits = 0
+        self.redis_errors = 0
+        self.misses = 0
+
+    @property
+    def redis(self):
+        return get_redis_client(self.redis_url)
+
+    def _redis_key(self, key):
+        return f"{self.namespace}:{key}"
+
+    def get(self, key):
+        value = self.local.get(key)
+        if value is not None:
+            return copy.deepcopy(value)
+
+        client = self.redis
+        if client is not None:
+            try:
+                raw = client.get(self._redis_key(key))
+            except Exception as e:
+                logger.warning(f"Redis cache read error ({self.namespace}): {e}")
+                with self._lock:
+                    self.redis_errors += 1
+                raw = None
+            if raw is not None:
+                value = json.loads(raw)
+                self.local.set(key, copy.deepcopy(value))
+                with self._lock:
+                    self.redis_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, value, ttl=None):
+        ttl = ttl if ttl is not None else self.ttl
+        self.local.set(key, copy.deepcopy(value), ttl=ttl)
+        client = self.redis
+        if client is not None:
+            try:
+                client.set(self._redis_key(key), json.dumps(value, default=str), ex=int(ttl) if ttl else None)
+            except Exception as e:
+                logger.warning(f"Redis cache write error ({self.namespace}): {e}")
+                with self._lock:
+                    self.redis_errors += 1
+
+    def delete(self, key):
+        self.local.delete(key)
+        client = self.redis
+        if client is not None:
+            try:
+                client.delete(self._redis_key(key))
+            except Exception as e:
+                logger.warning(f"Redis cache delete error ({self.namespace}): {e}")
+
+    def stats(self):
+        local = self.local.stats()
+        with self._lock:
+            hits = local['hits'] + self.redis_hits
+            lookups = hits + self.misses
+            return {
+                'namespace': self.namespace,
+                'redis_enabled': self.redis is not None,
+                'memory': local,
+                'redis_hits': self.redis_hits,
+                'redis_errors': self.redis_errors,
+                'hits': hits,
+                'misses': self.misses,
+                'hit_rate': round(hits / lookups, 3) if lookups else 0,
+            }
@@ -0,0 +1,145 @@
+"""
+Incremental extraction of the JSON object embedded in an LLM completion
+"""
+import json
+import threading
+
+
+class JSONExtractionError(ValueError):
+    """No valid JSON object could be extracted from the completion"""
+
+    def __init__(self, message, reason):
+        super().__init__(message)
+        self.reason = reason
+
+
+class JSONExtractor:
+    """
+    Balanced-brace scanner that accepts the completion in chunks and stops
+    at the first complete top-level object that parses. Text before the
+    object (prose, code fences) is skipped without buffering and anything
+    after it, including stray braces, is ignored. A brace-balanced span
+    that is not valid JSON (e.g. "{see below}") is skipped and scanning
+    resumes right after its opening brace.
+    """
+
+    def __init__(self, validator=None, name='default'):
+        self.validator = validator
+        self.name = name
+        self.value = None
+        self.done = False
+        self._buffer = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk):
+        """Consume a chunk; returns the object once it is complete, else None"""
+        pending = chunk
+        while pending and not self.done:
+            pending = self._scan(pending)
+        return self.value
+
+    def _scan(self, chunk):
+        if self._depth == 0:
+            start = chunk.find('{')
+            if start < 0:
+                return ''
+            chunk = chunk[start:]
+
+        for i, char in enumerate(chunk):
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == '{':
+                self._depth += 1
+            elif char == '}':
+                self._depth -= 1
+                if self._depth == 0:
+                    self._buffer.append(chunk[:i + 1])
+                    text = ''.join(self._buffer)
+                    self._buffer = []
+                    try:
+                        value = json.loads(text)
+                    except ValueError:
+                        self._in_string = self._escape = False
+                        return text[1:] + chunk[i + 1:]
+                    self.value = value
+                    self.done = True
+                    return ''
+        self._buffer.append(chunk)
+        return ''
+
+    def finish(self):
+        """
+        Return the validated object, or raise JSONExtractionError. Either
+        outcome is counted in ``parse_stats`` under this extractor's name.
+        """
+        if not self.done:
+            parse_stats.record(self.name, 'not_found')
+            raise JSONExtractionError("No complete JSON object in completion", 'not_found')
+        if self.validator is not None:
+            try:
+                self.validator(self.value)
+            except (ValueError, TypeError, KeyError) as e:
+                parse_stats.record(self.name, 'schema')
+                raise JSONExtractionError(f"JSON object failed validation: {e}", 'schema')
+        parse_stats.record(self.name, None)
+        return self.value
+
+
+def extract_json(text, validator=None, name='default'):
+    """Extract and validate the first JSON object in a complete text"""
+    extractor = JSONExtractor(validator, name)
+    extractor.feed(text)
+    return extractor.finish()
+
+
+def require(obj, fields):
+    """Minimal schema check: ``fields`` maps required keys to expected types"""
+    if not isinstance(obj, dict):
+        raise TypeError(f"expected an object, got {type(obj).__name__}")
+    for key, expected in fields.items():
+        if key not in obj:
+            raise KeyError(f"missing '{key}'")
+        if not isinstance(obj[key], expected):
+            raise TypeError(f"'{key}' has type {type(obj[key]).__name__}")
+
+
+class ParseStats:
+    """Per call site extraction attempts and failures by reason"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sites = {}
+
+    def record(self, name, failure_reason):
+        with self._lock:
+            site = self._sites.setdefault(name, {'attempts': 0, 'failures': {}})
+            site['attempts'] += 1
+            if failure_reason:
+                site['failures'][failure_reason] = site['failures'].get(failure_reason, 0) + 1
+
+    def stats(self, name=None):
+        with self._lock:
+            sites = {name: self._sites.get(name)} if name else dict(self._sites)
+            result = {}
+            for site_name, site in sites.items():
+                if site is None:
+                    continue
+                failures = sum(site['failures'].values())
+                result[site_name] = {
+                    'attempts': site['attempts'],
+                    'failures': dict(site['failures']),
+                    'failure_rate': round(failures / site['attempts'], 3) if site['attempts'] else 0,
+                }
+            return result
+
+
+parse_stats = ParseStats()
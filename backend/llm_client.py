@@ -0,0 +1,293 @@
+"""
+Shared Groq chat-completions client: pooled keep-alive connections, bounded
+concurrency, jittered retries and a circuit breaker
+"""
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+GROQ_CHAT_URL = 'https://api.groq.com/openai/v1/chat/completions'
+DEFAULT_MODEL = 'llama3-8b-8192'
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    """The completion could not be obtained; callers fall back"""
+
+
+class CircuitOpenError(LLMError):
+    """Raised without a network call while the breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Opens after ``failure_threshold`` consecutive failed calls and rejects
+    calls for ``reset_timeout`` seconds, then lets a single probe through.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self.opened = 0
+        self.short_circuited = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return 'closed'
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def allow(self):
+        with self._lock:
+            state = self._state()
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._probing:
+                self._probing = True
+                return True
+            self.short_circuited += 1
+            return False
+
+    def cancel_probe(self):
+        """Give back a half-open probe slot that was granted but not used"""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                if self._opened_at is None or self._probing:
+                    self.opened += 1
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+
+class GroqClient:
+    """Thread-safe client; one instance is shared per process via get_client()"""
+
+    def __init__(self, pool_size=10, max_concurrency=8, max_retries=2, backoff_base=0.5,
+                 backoff_max=4.0, timeout=30.0, acquire_timeout=5.0, breaker=None):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.acquire_timeout = acquire_timeout
+        self.breaker = breaker or CircuitBreaker()
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self.max_concurrency = max_concurrency
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+
+    def _headers(self):
+        return {
+            'Authorization': f'Bearer {settings.GROQ_API_KEY}',
+            'Content-Type': 'application/json'
+        }
+
+    def _backoff(self, attempt, response=None):
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        # Full jitter
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    @contextmanager
+    def _slot(self):
+        """Admission through the circuit breaker and the concurrency semaphore"""
+        if not getattr(settings, 'GROQ_API_KEY', None):
+            raise LLMError("GROQ_API_KEY is not configured")
+        if not self.breaker.allow():
+            raise CircuitOpenError("Groq circuit breaker is open")
+        if not self._semaphore.acquire(timeout=self.acquire_timeout):
+            self.breaker.cancel_probe()
+            raise LLMError("Too many concurrent Groq requests")
+        with self._lock:
+            self.calls += 1
+        try:
+            yield
+        finally:
+            self._semaphore.release()
+
+    def post(self, payload, timeout=None, deadline=None):
+        """
+        POST a chat-completions payload with retries, returning the successful
+        ``requests.Response``. ``deadline`` (a time.monotonic() value) caps
+        the total time spent including retries.
+        """
+        with self._slot():
+            return self._post(payload, timeout, deadline)
+
+    def _post(self, payload, timeout=None, deadline=None, stream=False):
+        timeout = timeout or self.timeout
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            call_timeout = timeout
+            if deadline is not None:
+                call_timeout = min(timeout, deadline - time.monotonic())
+                if call_timeout <= 0:
+                    last_error = LLMError("Groq deadline exceeded")
+                    break
+            response = None
+            try:
+                response = self.session.post(
+                    GROQ_CHAT_URL, headers=self._headers(), json=payload,
+                    timeout=call_timeout, stream=stream
+                )
+                if response.status_code == 200:
+                    self.breaker.record_success()
+                    return response
+                last_error = LLMError(f"Groq API error: {response.status_code} {response.text[:200]}")
+                if response.status_code not in RETRYABLE_STATUS:
+                    # The provider answered; a rejected request is not an outage
+                    self.breaker.record_success()
+                    with self._lock:
+                        self.failures += 1
+                    raise last_error
+            except requests.RequestException as e:
+                last_error = LLMError(f"Groq request failed: {e}")
+
+            if attempt < self.max_retries:
+                delay = self._backoff(attempt, response)
+                if deadline is not None and time.monotonic() + delay >= deadline:
+                    break
+                with self._lock:
+                    self.retries += 1
+                time.sleep(delay)
+
+        self.breaker.record_failure()
+        with self._lock:
+            self.failures += 1
+        raise last_error or LLMError("Groq request failed")
+
+    def chat(self, messages, model=DEFAULT_MODEL, temperature=0.3, max_tokens=1000,
+             timeout=None, deadline=None):
+        """Return the assistant message content, or raise LLMError"""
+        payload = {
+            'model': model,
+            'messages': messages,
+            'temperature': temperature,
+            'max_tokens': max_tokens
+        }
+        response = self.post(payload, timeout=timeout, deadline=deadline)
+        try:
+            return response.json()['choices'][0]['message']['content']
+        except (ValueError, KeyError, IndexError) as e:
+            raise LLMError(f"Unexpected Groq response: {e}")
+
+    def stream_chat(self, messages, model=DEFAULT_MODEL, temperature=0.3, max_tokens=1000,
+                    timeout=None, deadline=None):
+        """
+        Generator yielding assistant content deltas as the provider streams
+        them. The concurrency slot is held until the stream is exhausted or
+        the generator is closed; retries only cover establishing the stream.
+        """
+        payload = {
+            'model': model,
+            'messages': messages,
+            'temperature': temperature,
+            'max_tokens': max_tokens,
+            'stream': True
+        }
+        with self._slot():
+            response = self._post(payload, timeout=timeout, deadline=deadline, stream=True)
+            try:
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith('data:'):
+                        continue
+                    data = line[len('data:'):].strip()
+                    if data == '[DONE]':
+                        return
+                    try:
+                        delta = json.loads(data)['choices'][0].get('delta', {})
+                    except (ValueError, KeyError, IndexError) as e:
+                        raise LLMError(f"Unexpected Groq stream chunk: {e}")
+                    if delta.get('content'):
+                        yield delta['content']
+            except requests.RequestException as e:
+                with self._lock:
+                    self.failures += 1
+                raise LLMError(f"Groq stream interrupted: {e}")
+            finally:
+                response.close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'failures': self.failures,
+                'retries': self.retries,
+                'max_concurrency': self.max_concurrency,
+                'breaker_state': self.breaker.state,
+                'breaker_opened': self.breaker.opened,
+                'short_circuited': self.breaker.short_circuited,
+            }
+
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Process-wide GroqClient configured from settings (recreated after a fork)"""
+    global _client, _client_pid
+    pid = os.getpid()
+    with _client_lock:
+        if _client is None or _client_pid != pid:
+            _client = GroqClient(
+                pool_size=getattr(settings, 'GROQ_POOL_SIZE', 10),
+                max_concurrency=getattr(settings, 'GROQ_MAX_CONCURRENCY', 8),
+                max_retries=getattr(settings, 'GROQ_MAX_RETRIES', 2),
+                timeout=getattr(settings, 'GROQ_TIMEOUT', 30),
+                breaker=CircuitBreaker(
+                    failure_threshold=getattr(settings, 'GROQ_BREAKER_FAILURES', 5),
+                    reset_timeout=getattr(settings, 'GROQ_BREAKER_RESET_SECONDS', 30),
+                ),
+            )
+            _client_pid = pid
+        return _client
+
+
+def chat(messages, **kwargs):
+    return get_client().chat(messages, **kwargs)
+
+
+def stream_chat(messages, **kwargs):
+    return get_client().stream_chat(messages, **kwargs)
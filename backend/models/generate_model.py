@@ -1,12 +1,21 @@
+import os
 import torch
 import torch.nn as nn
 from torchvision.models import resnet18
 
+def get_labels_path():
+    # Same resolution as the reports model registry, usable outside Django too
+    try:
+        from reports.model_registry import get_labels_path as registry_labels_path
+        return registry_labels_path()
+    except ImportError:
+        return os.path.join(os.path.dirname(os.path.abspath(__file__)), 'medmnist_global_labels.txt')
+
 def get_num_classes():
     # Load label mapping if you saved to a file during training
     try:
-        with open(r'D:\\AAA_Medical_AI\\medical-ai-platform\\backend\\models\\medmnist_global_labels.txt', 'r') as f:
-            return sum(1 for line in f)
+        with open(get_labels_path(), 'r') as f:
+            return sum(1 for line in f if line.strip())
     except Exception:
         # Fallback: set manually
         return 29  # <-- change to actual number (len(master_labels))
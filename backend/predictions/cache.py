@@ -0,0 +1,39 @@
+"""
+Prediction result cache keyed on the canonicalized symptom set
+"""
+import hashlib
+import json
+
+from django.conf import settings
+
+from backend.cache import TieredCache
+
+# Bump whenever the prediction prompt or its parsing changes
+PROMPT_VERSION = '1'
+
+prediction_cache = TieredCache(
+    'predictions',
+    max_size=getattr(settings, 'PREDICTION_CACHE_SIZE', 1024),
+    ttl=getattr(settings, 'PREDICTION_CACHE_TTL', 6 * 3600),
+)
+
+
+def canonical_symptoms(symptoms):
+    """Deduped, whitespace-collapsed, lowercased and sorted symptom list"""
+    return sorted({' '.join(s.lower().split()) for s in symptoms if s and s.strip()})
+
+
+def normalize_info(additional_info):
+    return ' '.join((additional_info or '').lower().split())
+
+
+def cache_key(symptoms, additional_info, model):
+    payload = json.dumps(
+        [PROMPT_VERSION, model, canonical_symptoms(symptoms), normalize_info(additional_info)],
+        separators=(',', ':'),
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def is_enabled():
+    return getattr(settings, 'PREDICTION_CACHE_ENABLED', True)
@@ -0,0 +1,156 @@
+"""
+In-process symptom classifier trained by scripts/ai-model-training.py
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+MODES = ('off', 'primary', 'fallback', 'prefilter', 'hedge')
+TOP_DISEASES = 3
+DEFAULT_URGENCY = 'medium'
+UNKNOWN_DISEASE = {
+    'name': 'Unknown Condition',
+    'description': 'Condition not found in database',
+    'medications': ['Consult healthcare provider'],
+    'recommendations': ['Seek medical attention'],
+}
+
+
+def get_mode():
+    mode = getattr(settings, 'LOCAL_MODEL_MODE', 'fallback')
+    if mode not in MODES:
+        logger.error(f"Unknown LOCAL_MODEL_MODE '{mode}', using 'off'")
+        return 'off'
+    return mode
+
+
+class LocalPredictor:
+    """
+    Loads the TF-IDF vectorizer, RandomForest and disease mapping once per
+    process. Classifier arrays are memory-mapped (joblib ``mmap_mode='r'``)
+    so forked workers share the pages instead of each holding a copy.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._error = None
+        self.model = None
+        self.vectorizer = None
+        self.disease_mapping = {}
+        self.predictions = 0
+        self.failures = 0
+        self.total_ms = 0.0
+
+    def _paths(self):
+        return (
+            getattr(settings, 'LOCAL_MODEL_PATH', 'medical_prediction_model.pkl'),
+            getattr(settings, 'LOCAL_VECTORIZER_PATH', 'symptom_vectorizer.pkl'),
+            getattr(settings, 'LOCAL_DISEASE_MAPPING_PATH', 'disease_mapping.json'),
+        )
+
+    def load(self):
+        """Load the artifacts on first use; returns False if they are unusable"""
+        if self._loaded:
+            return self._error is None
+        with self._lock:
+            if self._loaded:
+                return self._error is None
+            model_path, vectorizer_path, mapping_path = self._paths()
+            try:
+                import joblib
+
+                for path in (model_path, vectorizer_path, mapping_path):
+                    if not os.path.exists(path):
+                        raise FileNotFoundError(path)
+                self.model = joblib.load(model_path, mmap_mode='r')
+                self.vectorizer = joblib.load(vectorizer_path)
+                with open(mapping_path, 'r') as f:
+                    self.disease_mapping = json.load(f)
+                logger.info(f"Loaded local prediction model from {model_path}")
+            except Exception as e:
+                self._error = str(e)
+                logger.error(f"Local prediction model unavailable: {e}")
+            self._loaded = True
+            return self._error is None
+
+    @property
+    def available(self):
+        return self.load()
+
+    def predict(self, symptoms, additional_info=''):
+        """
+        Return a prediction in the same shape as the Groq tier, or None when
+        the model is not available.
+        """
+        if not self.load():
+            return None
+        start = time.perf_counter()
+        try:
+            # The classifier was trained on space-joined symptom lists
+            features = self.vectorizer.transform([' '.join(symptoms)])
+            probabilities = self.model.predict_proba(features)[0]
+            ranked = sorted(zip(self.model.classes_, probabilities), key=lambda item: item[1], reverse=True)
+            result = self._build_result(ranked[:TOP_DISEASES])
+        except Exception as e:
+            logger.error(f"Local prediction error: {e}")
+            with self._lock:
+                self.failures += 1
+            return None
+        with self._lock:
+            self.predictions += 1
+            self.total_ms += (time.perf_counter() - start) * 1000
+        return result
+
+    def _build_result(self, ranked):
+        top_label, top_probability = ranked[0]
+        top = self.disease_mapping.get(top_label, UNKNOWN_DISEASE)
+        diseases = []
+        for label, probability in ranked:
+            info = self.disease_mapping.get(label, UNKNOWN_DISEASE)
+            diseases.append({
+                'name': info['name'],
+                'probability': round(float(probability) * 100),
+                'description': info['description'],
+            })
+        return {
+            'diseases': diseases,
+            'medications': [
+                {'name': name, 'dosage': 'As directed', 'instructions': 'Follow package or pharmacist instructions'}
+                for name in top.get('medications', [])
+            ],
+            'recommendations': list(top.get('recommendations', [])) + [
+                'Consult healthcare provider if symptoms worsen'
+            ],
+            'urgency': top.get('urgency', DEFAULT_URGENCY),
+            'confidence_score': round(float(top_probability) * 100, 1),
+        }
+
+    def stats(self):
+        with self._lock:
+            return {
+                'mode': get_mode(),
+                'loaded': self._loaded and self._error is None,
+                'error': self._error,
+                'predictions': self.predictions,
+                'failures': self.failures,
+                'avg_ms': round(self.total_ms / self.predictions, 2) if self.predictions else 0,
+            }
+
+
+local_predictor = LocalPredictor()
+
+
+def is_confident(result):
+    """Prefilter gate: only confident, low-urgency local results skip Groq"""
+    return (
+        result is not None
+        and result['urgency'] == 'low'
+        and result['confidence_score'] >= getattr(settings, 'LOCAL_MODEL_PREFILTER_CONFIDENCE', 80)
+    )
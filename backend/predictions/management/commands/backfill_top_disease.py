@@ -0,0 +1,38 @@
+"""
+Store top_disease on predictions saved before it was denormalized.
+
+    python manage.py backfill_top_disease
+    python manage.py backfill_top_disease --all --batch-size 2000
+"""
+from django.core.management.base import BaseCommand
+from pymongo import UpdateOne
+
+from predictions.models import Prediction, compute_top_disease
+
+
+class Command(BaseCommand):
+    help = "Compute top_disease from predicted_diseases for existing predictions"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="recompute every prediction, not only missing ones")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        predictions = Prediction.objects if options['all'] else Prediction.objects(top_disease=None)
+        predictions = predictions.only('id', 'predicted_diseases').batch_size(options['batch_size'])
+        collection = Prediction._get_collection()
+
+        updates = []
+        updated = 0
+        for prediction in predictions:
+            top = compute_top_disease(prediction.predicted_diseases)
+            if top is None:
+                continue
+            updates.append(UpdateOne({'_id': prediction.id}, {'$set': {'top_disease': top}}))
+            if len(updates) >= options['batch_size']:
+                updated += collection.bulk_write(updates, ordered=False).modified_count
+                updates = []
+                self.stdout.write(f"{updated} predictions updated")
+        if updates:
+            updated += collection.bulk_write(updates, ordered=False).modified_count
+        self.stdout.write(self.style.SUCCESS(f"Backfilled top_disease on {updated} predictions"))
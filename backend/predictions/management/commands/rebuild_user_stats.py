@@ -0,0 +1,31 @@
+"""
+Recompute materialized per-user prediction stats from the predictions.
+
+    python manage.py rebuild_user_stats
+    python manage.py rebuild_user_stats --user someone@example.com
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import UserProfile
+from predictions.stats import seed_user_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild UserStats documents with one aggregation per user"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', default=None, help="email of a single user to rebuild")
+
+    def handle(self, *args, **options):
+        if options['user']:
+            users = UserProfile.objects(email=options['user'])
+            if not users.count():
+                raise CommandError(f"No user with email {options['user']}")
+        else:
+            users = UserProfile.objects.only('id')
+
+        rebuilt = 0
+        for user in users:
+            seed_user_stats(user)
+            rebuilt += 1
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt stats for {rebuilt} users"))
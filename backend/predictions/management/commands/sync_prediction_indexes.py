@@ -0,0 +1,39 @@
+"""
+Bring the predictions collection's indexes in line with Prediction.meta.
+
+    python manage.py sync_prediction_indexes --dry-run
+    python manage.py sync_prediction_indexes
+
+mongoengine creates declared indexes but never drops old ones. Run this
+once after upgrading to the keyset-paginated history: it creates
+('user', '-created_at', '-id') and removes the ('user', '-created_at')
+index it replaces, along with any other index no longer declared.
+"""
+from django.core.management.base import BaseCommand
+
+from predictions.models import Prediction
+
+
+class Command(BaseCommand):
+    help = "Create declared Prediction indexes and drop ones no longer declared"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="only list the changes")
+
+    def handle(self, *args, **options):
+        differences = Prediction.compare_indexes()
+        for spec in differences['missing']:
+            self.stdout.write(f"missing: {spec}")
+        for spec in differences['extra']:
+            self.stdout.write(f"extra: {spec}")
+        if options['dry_run']:
+            return
+
+        Prediction.ensure_indexes()
+        collection = Prediction._get_collection()
+        for spec in differences['extra']:
+            collection.drop_index(spec)
+            self.stdout.write(f"dropped {spec}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(differences['missing'])} and dropped {len(differences['extra'])} indexes"
+        ))
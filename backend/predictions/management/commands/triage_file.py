@@ -0,0 +1,207 @@
+"""
+Run a JSONL or CSV file of symptom records through the prediction pipeline.
+
+    python manage.py triage_file records.jsonl --output results.jsonl --concurrency 8
+    python manage.py triage_file records.csv --output results.jsonl --save-predictions --user research@example.com
+
+Each input record needs a symptoms field (a list, or a comma/semicolon
+separated string) and may carry additional info and an id. Results are
+appended to the output in input order. Progress is checkpointed next to
+the output so an interrupted run resumes where it stopped.
+"""
+import csv
+import itertools
+import json
+import os
+import re
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import UserProfile
+from predictions.local_model import local_predictor
+from predictions.models import Prediction
+from predictions.serializers import PredictionCreateSerializer
+from predictions.views import LOCAL_SOURCE, build_prediction, predict_with_cache
+
+
+class Command(BaseCommand):
+    help = "Stream symptom records from a JSONL/CSV file through the prediction pipeline"
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help="JSONL or CSV file of symptom records")
+        parser.add_argument('--output', required=True, help="JSONL file results are appended to")
+        parser.add_argument('--format', choices=['auto', 'jsonl', 'csv'], default='auto')
+        parser.add_argument('--tier', choices=['auto', 'local'], default='auto',
+                            help="auto uses the full pipeline (caches, Groq, hedging); local only the trained model")
+        parser.add_argument('--concurrency', type=int, default=4, help="records evaluated at once")
+        parser.add_argument('--symptoms-field', default='symptoms')
+        parser.add_argument('--info-field', default='additional_info')
+        parser.add_argument('--id-field', default='id')
+        parser.add_argument('--limit', type=int, default=None, help="stop after this many records")
+        parser.add_argument('--checkpoint', default=None, help="defaults to <output>.checkpoint")
+        parser.add_argument('--checkpoint-every', type=int, default=100)
+        parser.add_argument('--restart', action='store_true', help="ignore an existing checkpoint and output")
+        parser.add_argument('--save-predictions', action='store_true', help="also store Prediction documents")
+        parser.add_argument('--user', default=None, help="email of the user that owns saved predictions")
+        parser.add_argument('--batch-size', type=int, default=500, help="Prediction documents per bulk insert")
+        parser.add_argument('--progress-every', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        self.options = options
+        if not os.path.exists(options['input']):
+            raise CommandError(f"Input not found: {options['input']}")
+        if options['concurrency'] < 1:
+            raise CommandError("--concurrency must be at least 1")
+
+        self.user = None
+        if options['save_predictions']:
+            if not options['user']:
+                raise CommandError("--user is required with --save-predictions")
+            self.user = UserProfile.objects(email=options['user']).first()
+            if not self.user:
+                raise CommandError(f"No user with email {options['user']}")
+        if options['tier'] == 'local' and not local_predictor.available:
+            raise CommandError("The local prediction model is not available, see LOCAL_MODEL_PATH")
+
+        checkpoint_path = options['checkpoint'] or options['output'] + '.checkpoint'
+        start_line, output_offset = self.read_checkpoint(checkpoint_path, options['restart'])
+        if start_line:
+            if not os.path.exists(options['output']) or os.path.getsize(options['output']) < output_offset:
+                raise CommandError("Output is shorter than the checkpoint records; rerun with --restart")
+            self.stdout.write(f"Resuming after record {start_line}")
+
+        with open(options['output'], 'a+', encoding='utf-8') as output:
+            # Drop results written after the last checkpoint; they are recomputed
+            output.truncate(output_offset)
+            output.seek(output_offset)
+            self.run(output, checkpoint_path, start_line)
+
+    def read_checkpoint(self, path, restart):
+        if restart or not os.path.exists(path):
+            return 0, 0
+        with open(path, 'r') as f:
+            checkpoint = json.load(f)
+        return checkpoint['records'], checkpoint['output_bytes']
+
+    def write_checkpoint(self, path, output, records):
+        output.flush()
+        os.fsync(output.fileno())
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump({'records': records, 'output_bytes': output.tell()}, f)
+        os.replace(temp_path, path)
+
+    def iter_records(self, start_line):
+        fmt = self.options['format']
+        if fmt == 'auto':
+            fmt = 'csv' if self.options['input'].lower().endswith('.csv') else 'jsonl'
+        with open(self.options['input'], 'r', encoding='utf-8', newline='') as f:
+            if fmt == 'csv':
+                rows = csv.DictReader(f)
+            else:
+                rows = (line for line in f if line.strip())
+            records = itertools.islice(enumerate(rows, start=1), start_line, None)
+            if self.options['limit'] is not None:
+                records = itertools.islice(records, max(0, self.options['limit'] - start_line))
+            for number, row in records:
+                yield number, row if fmt == 'csv' else self.parse_json_line(row)
+
+    @staticmethod
+    def parse_json_line(line):
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            return {'_error': f"Invalid JSON: {e}"}
+        return record if isinstance(record, dict) else {'_error': "Record is not a JSON object"}
+
+    def parse_record(self, record):
+        if '_error' in record:
+            return None, record['_error']
+        symptoms = record.get(self.options['symptoms_field'])
+        if isinstance(symptoms, str):
+            symptoms = re.split(r'[;,]', symptoms)
+        serializer = PredictionCreateSerializer(data={
+            'symptoms': symptoms or [],
+            'additional_info': record.get(self.options['info_field']) or '',
+        })
+        if not serializer.is_valid():
+            return None, serializer.errors
+        return serializer.validated_data, None
+
+    def evaluate(self, symptoms, additional_info):
+        if self.options['tier'] == 'local':
+            result = local_predictor.predict(symptoms, additional_info)
+            if result is None:
+                raise RuntimeError("Local prediction failed")
+            return result, LOCAL_SOURCE
+        return predict_with_cache(symptoms, additional_info)
+
+    def run(self, output, checkpoint_path, start_line):
+        window = deque()
+        max_in_flight = self.options['concurrency'] * 2
+        self.documents = []
+        self.sources = Counter()
+        self.errors = 0
+        self.processed = 0
+        self.started = time.monotonic()
+        completed_line = start_line
+
+        with ThreadPoolExecutor(max_workers=self.options['concurrency'], thread_name_prefix='triage') as pool:
+            for number, record in self.iter_records(start_line):
+                data, error = self.parse_record(record)
+                future = None if error else pool.submit(self.evaluate, data['symptoms'], data.get('additional_info', ''))
+                window.append((number, record, data, error, future))
+                # Bounded in-flight window; results are written in input order
+                while len(window) >= max_in_flight:
+                    completed_line = self.complete(window.popleft(), output, checkpoint_path)
+            while window:
+                completed_line = self.complete(window.popleft(), output, checkpoint_path)
+
+        self.flush_documents()
+        self.write_checkpoint(checkpoint_path, output, completed_line)
+        self.report_progress(final=True)
+
+    def complete(self, entry, output, checkpoint_path):
+        number, record, data, error, future = entry
+        record_id = record.get(self.options['id_field'], number) if isinstance(record, dict) else number
+        row = {'line': number, 'id': record_id}
+        if error is None:
+            try:
+                result, source = future.result()
+                row.update({'ai_model_used': source, 'prediction': result})
+                self.sources[source] += 1
+                if self.user is not None:
+                    self.documents.append(build_prediction(
+                        self.user, data['symptoms'], data.get('additional_info', ''), result, source
+                    ))
+            except Exception as e:
+                error = str(e)
+        if error is not None:
+            row['error'] = error
+            self.errors += 1
+        output.write(json.dumps(row, default=str) + '\n')
+        self.processed += 1
+
+        if (len(self.documents) >= self.options['batch_size']
+                or self.processed % self.options['checkpoint_every'] == 0):
+            # Every flush is checkpointed, so a resume never inserts saved documents twice
+            self.flush_documents()
+            self.write_checkpoint(checkpoint_path, output, number)
+        if self.processed % self.options['progress_every'] == 0:
+            self.report_progress()
+        return number
+
+    def flush_documents(self):
+        if self.documents:
+            Prediction.bulk_insert(self.documents)
+            self.documents = []
+
+    def report_progress(self, final=False):
+        elapsed = time.monotonic() - self.started
+        rate = self.processed / elapsed if elapsed else 0
+        sources = ', '.join(f"{source}={count}" for source, count in self.sources.most_common())
+        message = f"{self.processed} records in {elapsed:.1f}s ({rate:.1f}/s), {self.errors} errors [{sources}]"
+        self.stdout.write(self.style.SUCCESS(message) if final else message)
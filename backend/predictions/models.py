@@ -1,10 +1,30 @@
 """
 Prediction models using MongoDB
 """
-from mongoengine import Document, StringField, ListField, DateTimeField, FloatField, ReferenceField, IntField,DictField  
+import logging
+from collections import defaultdict
+
+from mongoengine import Document, StringField, ListField, DateTimeField, FloatField, ReferenceField, IntField,DictField, BooleanField
 from datetime import datetime
+from django.conf import settings
 from accounts.models import UserProfile
 
+logger = logging.getLogger(__name__)
+
+
+def most_likely_disease(predicted_diseases):
+    """The full entry of the disease with highest probability, or None"""
+    if not predicted_diseases:
+        return None
+    return max(predicted_diseases, key=lambda x: x.get('probability', 0))
+
+def compute_top_disease(predicted_diseases):
+    """Name and probability of the most likely disease, or None"""
+    top = most_likely_disease(predicted_diseases)
+    if top is None:
+        return None
+    return {'name': top.get('name'), 'probability': top.get('probability')}
+
 class Prediction(Document):
     """
     Medical prediction model
@@ -23,23 +43,89 @@ class Prediction(Document):
     created_at = DateTimeField(default=datetime.utcnow)
     ai_model_used = StringField(default='groq-llama3')
     confidence_score = FloatField(min_value=0, max_value=100)
+
+    # Denormalized from predicted_diseases on every save/bulk insert
+    top_disease = DictField(null=True)
     
     meta = {
         'collection': 'predictions',
         'indexes': [
-            ('user', '-created_at'),
+            # Covers history pages, which sort on (created_at, id) for a stable cursor.
+            # Replaces ('user', '-created_at'); drop that with `manage.py sync_prediction_indexes`
+            ('user', '-created_at', '-id'),
             'symptoms',
             'urgency',
-            '-created_at'
+            '-created_at',
+            'top_disease.name'
         ]
     }
     
     def __str__(self):
         return f"Prediction for {self.user.email} - {self.created_at}"
-    
-    @property
-    def top_disease(self):
-        """Get the disease with highest probability"""
-        if self.predicted_diseases:
-            return max(self.predicted_diseases, key=lambda x: x.get('probability', 0))
-        return None
+
+    def save(self, *args, **kwargs):
+        created = self.pk is None
+        self.top_disease = compute_top_disease(self.predicted_diseases)
+        result = super().save(*args, **kwargs)
+        if created:
+            UserStats.record([self])
+        return result
+
+    @classmethod
+    def bulk_insert(cls, predictions):
+        """Insert new predictions with one write and update their users' stats"""
+        for prediction in predictions:
+            prediction.top_disease = compute_top_disease(prediction.predicted_diseases)
+        ids = cls.objects.insert(predictions, load_bulk=False)
+        for prediction, prediction_id in zip(predictions, ids):
+            prediction.id = prediction_id
+        UserStats.record(predictions)
+        return ids
+
+
+class UserStats(Document):
+    """
+    Per-user prediction totals kept up to date as predictions are created,
+    so /api/predictions/stats/ is a single document read. ``seeded`` is set
+    once the totals include the user's history from before the document
+    existed (see predictions.stats).
+    """
+    user = ReferenceField(UserProfile, required=True, unique=True)
+    total_predictions = IntField(default=0)
+    confidence_sum = FloatField(default=0)
+    urgency_counts = DictField()
+    last_prediction = DateTimeField()
+    seeded = BooleanField(default=False)
+    updated_at = DateTimeField(default=datetime.utcnow)
+
+    meta = {
+        'collection': 'user_stats'
+    }
+
+    @classmethod
+    def record(cls, predictions):
+        """Add newly created predictions to their users' totals (one upsert per user)"""
+        if not getattr(settings, 'PREDICTION_STATS_MATERIALIZED', False):
+            return
+        totals = defaultdict(lambda: {'count': 0, 'confidence': 0.0, 'urgency': defaultdict(int), 'last': None})
+        for prediction in predictions:
+            user_id = prediction.user.pk if hasattr(prediction.user, 'pk') else prediction.user
+            total = totals[user_id]
+            total['count'] += 1
+            total['confidence'] += prediction.confidence_score or 0
+            total['urgency'][prediction.urgency] += 1
+            if total['last'] is None or prediction.created_at > total['last']:
+                total['last'] = prediction.created_at
+        for user_id, total in totals.items():
+            try:
+                cls.objects(user=user_id).update_one(
+                    upsert=True,
+                    inc__total_predictions=total['count'],
+                    inc__confidence_sum=total['confidence'],
+                    max__last_prediction=total['last'],
+                    set__updated_at=datetime.utcnow(),
+                    **{f'inc__urgency_counts__{urgency}': count for urgency, count in total['urgency'].items()}
+                )
+            except Exception as e:
+                # `manage.py rebuild_user_stats` recomputes totals that drifted
+                logger.error(f"User stats update failed for {user_id}: {e}")
@@ -0,0 +1,105 @@
+"""
+Keyset (cursor) pagination for mongoengine querysets
+"""
+import base64
+import json
+from datetime import datetime
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from mongoengine.queryset.visitor import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination:
+    """
+    Pages through a queryset newest first on (created_at, id) without
+    skip(): each page is a range scan starting right after the previous
+    page's last item, so latency does not grow with page depth. The cursor
+    is an opaque token holding that boundary and the direction. The total
+    count is only computed when ``?count=true`` is passed.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 50
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request.query_params.get(self.cursor_query_param))
+        self.count = None
+        if request.query_params.get(self.count_query_param, '').lower() in ('1', 'true', 'yes'):
+            self.count = queryset.count()
+
+        if cursor is None:
+            direction = 'next'
+            page = queryset.order_by('-created_at', '-id')
+        elif cursor['d'] == 'next':
+            direction = 'next'
+            page = queryset.filter(
+                Q(created_at__lt=cursor['t']) | Q(created_at=cursor['t'], id__lt=cursor['id'])
+            ).order_by('-created_at', '-id')
+        else:
+            direction = 'prev'
+            page = queryset.filter(
+                Q(created_at__gt=cursor['t']) | Q(created_at=cursor['t'], id__gt=cursor['id'])
+            ).order_by('created_at', 'id')
+
+        items = list(page.limit(self.page_size + 1))
+        has_more = len(items) > self.page_size
+        items = items[:self.page_size]
+        if direction == 'prev':
+            items.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        self.page = items
+        return items
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    @staticmethod
+    def encode_cursor(item, direction):
+        payload = {'t': item.created_at.isoformat(), 'id': str(item.id), 'd': direction}
+        return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(token):
+        if not token:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+            return {
+                't': datetime.fromisoformat(payload['t']),
+                'id': ObjectId(payload['id']),
+                'd': 'prev' if payload.get('d') == 'prev' else 'next',
+            }
+        except (ValueError, KeyError, TypeError, InvalidId):
+            raise NotFound("Invalid cursor")
+
+    def get_link(self, item, direction):
+        url = self.request.build_absolute_uri()
+        if item is None:
+            return remove_query_param(url, self.cursor_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(item, direction))
+
+    def get_paginated_response(self, data):
+        next_link = self.get_link(self.page[-1], 'next') if self.has_next and self.page else None
+        previous_link = None
+        if self.has_previous:
+            previous_link = self.get_link(self.page[0], 'prev') if self.page else self.get_link(None, 'prev')
+        return Response({
+            'count': self.count,
+            'next': next_link,
+            'previous': previous_link,
+            'results': data,
+        })
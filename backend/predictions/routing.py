@@ -0,0 +1,169 @@
+"""
+Deadline-aware hedged routing between prediction tiers
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Number of recent latencies kept per tier for percentile reporting
+LATENCY_WINDOW = 1000
+
+
+class HedgedRouter:
+    """
+    Runs the primary tier (Groq) and, if it has not produced a valid result
+    after ``hedge_delay`` seconds or fails sooner, the hedge tier (local
+    model) alongside it. The first valid result inside the latency budget
+    wins; the other call is cancelled if it has not started and otherwise
+    left to finish (the Groq call is itself bounded by the same deadline),
+    handing a late primary result to ``on_late``. When neither tier answers
+    in time the fallback is returned.
+
+    Tiers are ``(name, callable)`` pairs; a callable returns a result or
+    None, or raises.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._latencies = {}
+        self._calls = {}
+        self._wins = {}
+        self._failures = {}
+        self._route_latencies = deque(maxlen=LATENCY_WINDOW)
+        self.routes = 0
+        self.hedges = 0
+        self.cancelled = 0
+        self.budget_exceeded = 0
+        self.late_results = 0
+
+    def get_executor(self):
+        pid = os.getpid()
+        with self._lock:
+            if self._executor is None or self._pid != pid:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'PREDICTION_ROUTING_WORKERS', 16),
+                    thread_name_prefix='prediction-route',
+                )
+                self._pid = pid
+            return self._executor
+
+    def _timed(self, name, fn):
+        start = time.perf_counter()
+        try:
+            result = fn()
+        except Exception as e:
+            logger.warning(f"Prediction tier {name} failed: {e}")
+            result = None
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self._calls[name] = self._calls.get(name, 0) + 1
+            self._latencies.setdefault(name, deque(maxlen=LATENCY_WINDOW)).append(elapsed_ms)
+            if result is None:
+                self._failures[name] = self._failures.get(name, 0) + 1
+        return result
+
+    def route(self, primary, hedge=None, fallback=None, budget=None, hedge_delay=None, on_late=None):
+        """Return (tier name, result); result is None only if every tier failed"""
+        budget = budget if budget is not None else getattr(settings, 'PREDICTION_LATENCY_BUDGET_SECONDS', 10)
+        hedge_delay = hedge_delay if hedge_delay is not None else getattr(settings, 'PREDICTION_HEDGE_DELAY_SECONDS', 2.0)
+        start = time.monotonic()
+        deadline = start + budget
+        executor = self.get_executor()
+
+        primary_name, primary_fn = primary
+        pending = {executor.submit(self._timed, primary_name, primary_fn): primary_name}
+        hedge_at = start + hedge_delay if hedge is not None else None
+        winner, result = None, None
+
+        while pending and winner is None:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            wake = deadline if hedge_at is None else min(deadline, hedge_at)
+            done, _ = wait(pending, timeout=max(0, wake - now), return_when=FIRST_COMPLETED)
+            for future in done:
+                name = pending.pop(future)
+                if future.result() is not None:
+                    winner, result = name, future.result()
+                    break
+            if winner is None and hedge_at is not None and (time.monotonic() >= hedge_at or not pending):
+                hedge_name, hedge_fn = hedge
+                pending[executor.submit(self._timed, hedge_name, hedge_fn)] = hedge_name
+                hedge_at = None
+                with self._lock:
+                    self.hedges += 1
+
+        timed_out = winner is None and bool(pending)
+        for future, name in pending.items():
+            if future.cancel():
+                with self._lock:
+                    self.cancelled += 1
+            elif name == primary_name and on_late is not None:
+                future.add_done_callback(lambda f: self._deliver_late(f, on_late))
+
+        if winner is None and fallback is not None:
+            winner, result = fallback[0], self._timed(*fallback)
+
+        with self._lock:
+            self.routes += 1
+            self.budget_exceeded += int(timed_out)
+            if winner is not None:
+                self._wins[winner] = self._wins.get(winner, 0) + 1
+            self._route_latencies.append((time.monotonic() - start) * 1000)
+        return winner, result
+
+    def _deliver_late(self, future, on_late):
+        result = future.result()
+        if result is None:
+            return
+        try:
+            on_late(result)
+        except Exception as e:
+            logger.error(f"Late prediction handler failed: {e}")
+        with self._lock:
+            self.late_results += 1
+
+    @staticmethod
+    def _percentiles(samples):
+        ordered = sorted(samples)
+        if not ordered:
+            return None
+        pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 1)
+        return {'p50': pick(0.50), 'p95': pick(0.95), 'p99': pick(0.99)}
+
+    def stats(self):
+        with self._lock:
+            tiers = {}
+            for name in set(self._calls) | set(self._wins):
+                tiers[name] = {
+                    'calls': self._calls.get(name, 0),
+                    'failures': self._failures.get(name, 0),
+                    'wins': self._wins.get(name, 0),
+                    'win_rate': round(self._wins.get(name, 0) / self.routes, 3) if self.routes else 0,
+                    'latency_ms': self._percentiles(self._latencies.get(name, ())),
+                }
+            return {
+                'routes': self.routes,
+                'hedges': self.hedges,
+                'cancelled': self.cancelled,
+                'budget_exceeded': self.budget_exceeded,
+                'late_results': self.late_results,
+                'latency_ms': self._percentiles(self._route_latencies),
+                'tiers': tiers,
+            }
+
+
+router = HedgedRouter()
+
+
+def is_enabled():
+    return getattr(settings, 'PREDICTION_HEDGING_ENABLED', True)
@@ -0,0 +1,222 @@
+"""
+Similarity-based cache for near-duplicate symptom submissions
+"""
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from django.conf import settings
+
+from .cache import PROMPT_VERSION, canonical_symptoms, normalize_info
+
+N_FEATURES = 2 ** 18
+SIMILARITY_BUCKETS = 10
+NEGATIONS = {'no', 'not', 'without', 'denies', 'deny', 'denied', 'absent', 'negative', 'never', 'none', 'nor'}
+
+
+def negated_terms(text):
+    """
+    Words that follow a negation ("no", "without", "doesn't", ...) up to the
+    end of their clause. Character n-grams barely separate "no fever, cough"
+    from "fever, cough", so entries only match when these sets are equal.
+    """
+    negated = set()
+    for clause in re.split(r'[,.;:!?\n]', text):
+        negating = False
+        for word in re.findall(r"[a-z0-9']+", clause):
+            if word in NEGATIONS or word.endswith("n't"):
+                negating = True
+            elif negating:
+                negated.add(word)
+    return frozenset(negated)
+
+
+class SemanticCache:
+    """
+    In-memory index of recent predictions, searched by cosine similarity of
+    TF-IDF vectors.
+
+    Like scripts/ai-model-training.py the submission is vectorized with
+    TF-IDF, but over hashed character n-grams ("head ache" and "headache"
+    share most of their n-grams) so new entries never require refitting a
+    vocabulary. Document frequencies are updated as entries are added: new
+    rows are appended to the index with the current IDF weights and the
+    whole index is re-weighted every ``rebuild_every`` inserts or after an
+    eviction.
+
+    Entries are namespaced by prompt version and model, and a near match is
+    only served when both submissions negate the same terms.
+    """
+
+    def __init__(self, threshold=0.9, capacity=2000, rebuild_every=256):
+        self.threshold = threshold
+        self.capacity = max(1, capacity)
+        self.rebuild_every = max(1, rebuild_every)
+        self._lock = threading.Lock()
+        self._vectorizer = None
+
+        self._entries = OrderedDict()  # (namespace, text) -> (tf row, value, negated terms)
+        self._df = np.zeros(N_FEATURES, dtype=np.float32)
+        self._matrix = None
+        self._row_keys = []
+        self._pending = []
+        self._stale = False
+        self._since_rebuild = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rebuilds = 0
+        self._similarity_histogram = [0] * SIMILARITY_BUCKETS
+
+    @property
+    def vectorizer(self):
+        if self._vectorizer is None:
+            from sklearn.feature_extraction.text import HashingVectorizer
+
+            self._vectorizer = HashingVectorizer(
+                analyzer='char_wb', ngram_range=(3, 5), n_features=N_FEATURES,
+                alternate_sign=False, norm=None,
+            )
+        return self._vectorizer
+
+    @staticmethod
+    def submission_text(symptoms, additional_info):
+        text = ', '.join(canonical_symptoms(symptoms))
+        info = normalize_info(additional_info)
+        return f"{text}. {info}" if info else text
+
+    @staticmethod
+    def namespace(model):
+        return f"{PROMPT_VERSION}:{model}"
+
+    def _term_frequencies(self, text):
+        row = self.vectorizer.transform([text]).tocsr()
+        row.data = 1 + np.log(row.data)  # sublinear tf
+        return row
+
+    def _idf(self):
+        n_docs = len(self._entries)
+        return (np.log((1 + n_docs) / (1 + self._df)) + 1).astype(np.float32)
+
+    def _weight(self, rows, idf):
+        from sklearn.preprocessing import normalize
+
+        weighted = rows.multiply(idf).tocsr()
+        return normalize(weighted, norm='l2', copy=False)
+
+    def _refresh(self):
+        """Bring the searchable matrix up to date with added/evicted entries"""
+        from scipy.sparse import vstack
+
+        if not self._entries:
+            self._matrix, self._row_keys, self._pending = None, [], []
+            self._stale = False
+            return
+        idf = self._idf()
+        if self._stale or self._matrix is None or self._since_rebuild >= self.rebuild_every:
+            self._row_keys = list(self._entries.keys())
+            rows = vstack([self._entries[key][0] for key in self._row_keys])
+            self._matrix = self._weight(rows, idf)
+            self._pending, self._stale, self._since_rebuild = [], False, 0
+            self.rebuilds += 1
+        elif self._pending:
+            rows = vstack([self._entries[key][0] for key in self._pending])
+            self._matrix = vstack([self._matrix, self._weight(rows, idf)]).tocsr()
+            self._row_keys.extend(self._pending)
+            self._pending = []
+
+    def lookup(self, symptoms, additional_info='', model=None):
+        """Return (value, similarity) of the closest entry above the threshold, else (None, best)"""
+        text = self.submission_text(symptoms, additional_info)
+        namespace = self.namespace(model)
+        key = (namespace, text)
+        negated = negated_terms(text)
+        tf = self._term_frequencies(text)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._record(1.0, True)
+                return self._entries[key][1], 1.0
+
+            self._refresh()
+            if self._matrix is None:
+                self._record(0.0, False)
+                return None, 0.0
+
+            query = self._weight(tf, self._idf())
+            similarities = (self._matrix @ query.T).toarray().ravel()
+            # Rows from another prompt/model or with different negations never match
+            eligible = np.fromiter(
+                (row_key[0] == namespace and row_key in self._entries and self._entries[row_key][2] == negated
+                 for row_key in self._row_keys),
+                dtype=bool, count=len(self._row_keys),
+            )
+            similarities[~eligible] = 0.0
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity >= self.threshold:
+                match = self._row_keys[best]
+                self._entries.move_to_end(match)
+                self._record(similarity, True)
+                return self._entries[match][1], similarity
+            self._record(similarity, False)
+            return None, similarity
+
+    def add(self, symptoms, additional_info, value, model=None):
+        text = self.submission_text(symptoms, additional_info)
+        key = (self.namespace(model), text)
+        tf = self._term_frequencies(text)
+        with self._lock:
+            if key in self._entries:
+                old_tf, _, negated = self._entries[key]
+                self._entries[key] = (old_tf, value, negated)
+                self._entries.move_to_end(key)
+                return
+            self._entries[key] = (tf, value, negated_terms(text))
+            self._df[tf.indices] += 1
+            self._pending.append(key)
+            self._since_rebuild += 1
+            while len(self._entries) > self.capacity:
+                _, (evicted_tf, _, _) = self._entries.popitem(last=False)
+                self._df[evicted_tf.indices] -= 1
+                self._stale = True
+                self.evictions += 1
+
+    def _record(self, similarity, hit):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        bucket = min(SIMILARITY_BUCKETS - 1, max(0, int(similarity * SIMILARITY_BUCKETS)))
+        self._similarity_histogram[bucket] += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            width = 1 / SIMILARITY_BUCKETS
+            return {
+                'size': len(self._entries),
+                'max_size': self.capacity,
+                'threshold': self.threshold,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0,
+                'rebuilds': self.rebuilds,
+                'best_similarity_histogram': {
+                    f"{i * width:.1f}-{(i + 1) * width:.1f}": count
+                    for i, count in enumerate(self._similarity_histogram)
+                },
+            }
+
+
+semantic_cache = SemanticCache(
+    threshold=getattr(settings, 'SEMANTIC_CACHE_THRESHOLD', 0.9),
+    capacity=getattr(settings, 'SEMANTIC_CACHE_CAPACITY', 2000),
+)
+
+
+def is_enabled():
+    return getattr(settings, 'SEMANTIC_CACHE_ENABLED', False)
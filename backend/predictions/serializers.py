@@ -1,8 +1,9 @@
 """
 Serializers for predictions
 """
+from django.conf import settings
 from rest_framework import serializers
-from .models import Prediction
+from .models import Prediction, most_likely_disease
 
 class PredictionCreateSerializer(serializers.Serializer):
     """Serializer for creating predictions"""
@@ -25,6 +26,20 @@ class PredictionCreateSerializer(serializers.Serializer):
         
         return cleaned_symptoms
 
+class PredictionBulkCreateSerializer(serializers.Serializer):
+    """Serializer for batch prediction requests; items are validated one by one in the view"""
+    items = serializers.ListField(
+        child=serializers.DictField(),
+        min_length=1,
+        error_messages={'min_length': 'At least one item is required.'}
+    )
+
+    def validate_items(self, value):
+        max_items = getattr(settings, 'PREDICTION_BULK_MAX_ITEMS', 50)
+        if len(value) > max_items:
+            raise serializers.ValidationError(f"At most {max_items} items are allowed per request.")
+        return value
+
 class PredictionSerializer(serializers.Serializer):
     """Serializer for prediction responses"""
     id = serializers.CharField(read_only=True)
@@ -42,10 +57,8 @@ class PredictionSerializer(serializers.Serializer):
     top_disease = serializers.SerializerMethodField()
     
     def get_top_disease(self, obj):
-        """Get the top predicted disease"""
-        if obj.predicted_diseases:
-            return max(obj.predicted_diseases, key=lambda x: x.get('probability', 0))
-        return None
+        """Get the top predicted disease (the full entry; history uses the stored projection)"""
+        return most_likely_disease(obj.predicted_diseases)
 
 class PredictionHistorySerializer(serializers.Serializer):
     """Serializer for prediction history"""
@@ -57,11 +70,5 @@ class PredictionHistorySerializer(serializers.Serializer):
     confidence_score = serializers.FloatField(read_only=True)
     
     def get_top_disease(self, obj):
-        """Get the top predicted disease"""
-        if obj.predicted_diseases:
-            top = max(obj.predicted_diseases, key=lambda x: x.get('probability', 0))
-            return {
-                'name': top.get('name'),
-                'probability': top.get('probability')
-            }
-        return None
+        """Get the top predicted disease (stored at write time, see backfill_top_disease)"""
+        return obj.top_disease or None
@@ -0,0 +1,78 @@
+"""
+Per-user prediction statistics: one server-side aggregation, optionally
+materialized in UserStats
+"""
+from django.conf import settings
+
+from .models import Prediction, UserStats
+
+URGENCY_LEVELS = ('low', 'medium', 'high')
+
+
+def is_materialized():
+    return getattr(settings, 'PREDICTION_STATS_MATERIALIZED', False)
+
+
+def aggregate_user_stats(user):
+    """Totals for ``user`` from a single $group over their predictions"""
+    pipeline = [
+        {'$group': {
+            '_id': '$urgency',
+            'count': {'$sum': 1},
+            'confidence_sum': {'$sum': {'$ifNull': ['$confidence_score', 0]}},
+            'last_prediction': {'$max': '$created_at'},
+        }},
+    ]
+    totals = {'total_predictions': 0, 'confidence_sum': 0.0, 'urgency_counts': {}, 'last_prediction': None}
+    for row in Prediction.objects(user=user).aggregate(pipeline):
+        totals['total_predictions'] += row['count']
+        totals['confidence_sum'] += row['confidence_sum']
+        totals['urgency_counts'][row['_id']] = row['count']
+        if totals['last_prediction'] is None or row['last_prediction'] > totals['last_prediction']:
+            totals['last_prediction'] = row['last_prediction']
+    return totals
+
+
+def seed_user_stats(user, totals=None):
+    """
+    Overwrite the user's materialized totals with a fresh aggregation.
+    Predictions created between the aggregation and the write can be
+    missed; `manage.py rebuild_user_stats` repairs any drift.
+    """
+    totals = totals or aggregate_user_stats(user)
+    UserStats.objects(user=user).update_one(
+        upsert=True,
+        set__total_predictions=totals['total_predictions'],
+        set__confidence_sum=totals['confidence_sum'],
+        set__urgency_counts=totals['urgency_counts'],
+        set__last_prediction=totals['last_prediction'],
+        set__seeded=True,
+    )
+    return totals
+
+
+def get_user_stats(user):
+    """Totals from UserStats when materialized and seeded, else aggregated (and seeded)"""
+    if not is_materialized():
+        return aggregate_user_stats(user)
+    stats = UserStats.objects(user=user).first()
+    if stats is not None and stats.seeded:
+        return {
+            'total_predictions': stats.total_predictions,
+            'confidence_sum': stats.confidence_sum,
+            'urgency_counts': stats.urgency_counts,
+            'last_prediction': stats.last_prediction,
+        }
+    return seed_user_stats(user)
+
+
+def stats_response(totals):
+    """Shape totals like the original /api/predictions/stats/ payload"""
+    total = totals['total_predictions']
+    urgency_breakdown = {level: totals['urgency_counts'].get(level, 0) for level in URGENCY_LEVELS}
+    return {
+        'total_predictions': total,
+        'avg_confidence': round(totals['confidence_sum'] / total, 1) if total else 0,
+        'last_prediction': totals['last_prediction'],
+        'urgency_breakdown': urgency_breakdown,
+    }
@@ -0,0 +1,125 @@
+"""
+Incremental parsing of streamed prediction completions
+"""
+import json
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+LATENCY_WINDOW = 1000
+
+
+class DiseaseStreamParser:
+    """
+    Consumes completion text chunk by chunk and returns each object of the
+    top-level ``"diseases"`` array as soon as its closing brace arrives.
+    Only the object currently being read is buffered. Like JSONExtractor, a
+    balanced top-level span without a "diseases" array (e.g. "{the}" in a
+    preamble) is skipped and scanning continues.
+    """
+
+    def __init__(self):
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._key_chars = []
+        self._last_key = None
+        self._diseases_depth = None
+        self._object = None
+        self._saw_diseases = False
+        self.done = False
+
+    def feed(self, chunk):
+        diseases = []
+        for char in chunk:
+            if self.done:
+                break
+            if not self._stack and char != '{':
+                continue
+            if self._object is not None:
+                self._object.append(char)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1:
+                        self._last_key = ''.join(self._key_chars)
+                elif len(self._stack) == 1:
+                    self._key_chars.append(char)
+                continue
+
+            if char == '"' and self._stack:
+                self._in_string = True
+                self._key_chars = []
+            elif char in '{[':
+                if char == '{' and self._diseases_depth == len(self._stack):
+                    self._object = ['{']
+                self._stack.append(char)
+                if char == '[' and len(self._stack) == 2 and self._last_key == 'diseases':
+                    self._diseases_depth = len(self._stack)
+                    self._saw_diseases = True
+            elif char in '}]' and self._stack:
+                self._stack.pop()
+                if char == '}' and self._object is not None and len(self._stack) == self._diseases_depth:
+                    try:
+                        diseases.append(json.loads(''.join(self._object)))
+                    except ValueError as e:
+                        logger.warning(f"Dropped malformed disease object from the stream: {e}")
+                    self._object = None
+                elif char == ']' and self._diseases_depth is not None and len(self._stack) < self._diseases_depth:
+                    self._diseases_depth = None
+                if not self._stack:
+                    if self._saw_diseases:
+                        self.done = True
+                    else:
+                        self._last_key = None
+                        self._diseases_depth = None
+        return diseases
+
+
+class StreamStats:
+    """Time-to-first-disease and completion counters for streamed predictions"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._first_disease_ms = deque(maxlen=LATENCY_WINDOW)
+        self._total_ms = deque(maxlen=LATENCY_WINDOW)
+        self.streams = 0
+        self.fallbacks = 0
+        self.errors = 0
+
+    def record(self, first_disease_ms, total_ms, fallback=False, error=False):
+        with self._lock:
+            self.streams += 1
+            self.fallbacks += int(fallback)
+            self.errors += int(error)
+            if first_disease_ms is not None:
+                self._first_disease_ms.append(first_disease_ms)
+            self._total_ms.append(total_ms)
+
+    @staticmethod
+    def _percentiles(samples):
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 1)
+        return {'p50': pick(0.50), 'p95': pick(0.95), 'p99': pick(0.99)}
+
+    def stats(self):
+        with self._lock:
+            return {
+                'streams': self.streams,
+                'fallbacks': self.fallbacks,
+                'errors': self.errors,
+                'time_to_first_disease_ms': self._percentiles(self._first_disease_ms),
+                'total_ms': self._percentiles(self._total_ms),
+            }
+
+
+stream_stats = StreamStats()
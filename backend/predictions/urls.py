@@ -6,7 +6,10 @@ from . import views
 
 urlpatterns = [
     path('create/', views.create_prediction, name='create_prediction'),
+    path('create/stream/', views.create_prediction_stream, name='create_prediction_stream'),
+    path('bulk/', views.create_predictions_bulk, name='create_predictions_bulk'),
     path('history/', views.prediction_history, name='prediction_history'),
     path('stats/', views.user_stats, name='user_stats'),
+    path('metrics/', views.predictions_metrics, name='predictions_metrics'),
     path('<str:prediction_id>/', views.prediction_detail, name='prediction_detail'),
 ]
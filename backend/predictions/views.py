@@ -1,63 +1,49 @@
-import json
 import logging
-import re
-import requests
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from mongoengine.errors import ValidationError as DocumentValidationError
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
 from django.conf import settings
 
-from accounts.models import UserProfile
+from backend import json_stream, llm_client, sse
 from .models import Prediction
-from .serializers import PredictionCreateSerializer, PredictionSerializer, PredictionHistorySerializer
+from .pagination import KeysetPagination
+from . import cache as prediction_cache
+from . import local_model, routing, semantic_cache
+from . import stats as prediction_stats
+from .streaming import DiseaseStreamParser, stream_stats
+from .serializers import (
+    PredictionBulkCreateSerializer, PredictionCreateSerializer, PredictionSerializer, PredictionHistorySerializer
+)
 
 logger = logging.getLogger(__name__)
 
-class PredictionPagination(PageNumberPagination):
-    page_size = 10
-    page_size_query_param = 'page_size'
-    max_page_size = 50
-
-def get_user_from_token(request):
-    """Extract user from JWT token"""
-    auth_header = request.META.get('HTTP_AUTHORIZATION', '')
-    if auth_header.startswith('Bearer '):
-        try:
-            import jwt
-            token = auth_header.split(' ')[1]
-            decoded = jwt.decode(token, options={"verify_signature": False})
-            user_id = decoded.get('user_id')
-            return UserProfile.objects(id=user_id).first()
-        except Exception as e:
-            logger.error(f"Token decode error: {e}")
-    return None
+GROQ_MODEL = 'llama3-8b-8192'
+GROQ_SOURCE = 'groq-llama3'
+MOCK_SOURCE = 'mock'
+LOCAL_SOURCE = 'local-rf'
+URGENCY_LEVELS = ('low', 'medium', 'high')
+# Fields PredictionHistorySerializer reads; history pages load nothing else
+HISTORY_FIELDS = ('id', 'symptoms', 'top_disease', 'urgency', 'created_at', 'confidence_score')
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def create_prediction(request):
     """Create a new medical prediction"""
-    user = get_user_from_token(request)
-    if not user:
-        return Response({'error': 'Authentication required'}, status=status.HTTP_401_UNAUTHORIZED)
+    user = request.user
     
     serializer = PredictionCreateSerializer(data=request.data)
     if serializer.is_valid():
         symptoms = serializer.validated_data['symptoms']
         additional_info = serializer.validated_data.get('additional_info', '')
         try:
-            prediction_result = generate_ai_prediction(symptoms, additional_info)
-            prediction = Prediction(
-                user=user,
-                symptoms=symptoms,
-                additional_info=additional_info,
-                predicted_diseases=prediction_result['diseases'],
-                medications=prediction_result['medications'],
-                recommendations=prediction_result['recommendations'],
-                urgency=prediction_result['urgency'],
-                confidence_score=prediction_result.get('confidence_score', 0)
-            )
+            prediction_result, ai_model_used = predict_with_cache(symptoms, additional_info)
+            prediction = build_prediction(user, symptoms, additional_info, prediction_result, ai_model_used)
             prediction.save()
             response_serializer = PredictionSerializer(prediction)
             return Response(response_serializer.data, status=status.HTTP_201_CREATED)
@@ -69,29 +55,185 @@ def create_prediction(request):
             )
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+_bulk_pool = None
+_bulk_pool_lock = threading.Lock()
+
+def get_bulk_pool():
+    global _bulk_pool
+    with _bulk_pool_lock:
+        if _bulk_pool is None:
+            _bulk_pool = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'PREDICTION_BULK_CONCURRENCY', 4),
+                thread_name_prefix='prediction-bulk'
+            )
+        return _bulk_pool
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def create_predictions_bulk(request):
+    """
+    Create predictions for a batch of symptom sets. Items are validated
+    individually, evaluated concurrently and saved with one bulk insert;
+    results and errors come back in input order.
+    """
+    user = request.user
+
+    serializer = PredictionBulkCreateSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    items = serializer.validated_data['items']
+
+    results = [None] * len(items)
+    pool = get_bulk_pool()
+    futures = []
+    for index, item in enumerate(items):
+        item_serializer = PredictionCreateSerializer(data=item)
+        if not item_serializer.is_valid():
+            results[index] = {'index': index, 'errors': item_serializer.errors}
+            continue
+        symptoms = item_serializer.validated_data['symptoms']
+        additional_info = item_serializer.validated_data.get('additional_info', '')
+        future = pool.submit(predict_with_cache, symptoms, additional_info)
+        futures.append((index, symptoms, additional_info, future))
+
+    pending = []
+    for index, symptoms, additional_info, future in futures:
+        try:
+            prediction_result, ai_model_used = future.result()
+            prediction = build_prediction(user, symptoms, additional_info, prediction_result, ai_model_used)
+            prediction.validate()
+        except Exception as e:
+            logger.error(f"Bulk prediction error for item {index}: {e}")
+            error = 'Invalid prediction result.' if isinstance(e, DocumentValidationError) else 'Failed to generate prediction.'
+            results[index] = {'index': index, 'errors': {'non_field_errors': [error]}}
+            continue
+        pending.append((index, prediction))
+
+    if pending:
+        try:
+            Prediction.bulk_insert([prediction for _, prediction in pending])
+        except Exception as e:
+            logger.error(f"Bulk prediction insert error: {e}")
+            return Response(
+                {'error': 'Failed to save predictions. Please try again.'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        for index, prediction in pending:
+            results[index] = {'index': index, 'prediction': PredictionSerializer(prediction).data}
+
+    return Response({
+        'created': len(pending),
+        'failed': len(items) - len(pending),
+        'results': results,
+    }, status=status.HTTP_201_CREATED if pending else status.HTTP_400_BAD_REQUEST)
+
+@api_view(['POST'])
+@renderer_classes([JSONRenderer, sse.EventStreamRenderer])
+@permission_classes([IsAuthenticated])
+def create_prediction_stream(request):
+    """
+    Create a prediction, streaming it as server-sent events: one ``disease``
+    event per condition as soon as the model finishes describing it, then a
+    ``complete`` event with the saved prediction.
+    """
+    user = request.user
+
+    serializer = PredictionCreateSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    symptoms = serializer.validated_data['symptoms']
+    additional_info = serializer.validated_data.get('additional_info', '')
+    return sse.event_stream_response(prediction_events(user, symptoms, additional_info))
+
+def prediction_events(user, symptoms, additional_info):
+    """
+    Generator behind create_prediction_stream. Cached, local-model and
+    fallback results are sent as a burst of ``disease`` events. If the
+    diseases already streamed differ from the final result (the Groq stream
+    failed, or the parser dropped a malformed entry), a ``reset`` event tells
+    the client to discard them before the full list follows.
+    """
+    started = time.monotonic()
+    first_disease_ms = None
+    streamed = []
+    fallback = False
+
+    cached = lookup_cached_prediction(symptoms, additional_info) or local_first_prediction(symptoms, additional_info)
+    if cached is not None:
+        result, source = cached
+    else:
+        result, source = None, GROQ_SOURCE
+        if getattr(settings, 'GROQ_API_KEY', None):
+            parser = DiseaseStreamParser()
+            extractor = json_stream.JSONExtractor(validate_prediction_result, name='predictions')
+            try:
+                for chunk in llm_client.stream_chat(
+                    build_prediction_messages(symptoms, additional_info),
+                    model=GROQ_MODEL, temperature=0.3, max_tokens=1000, timeout=30
+                ):
+                    extractor.feed(chunk)
+                    for disease in parser.feed(chunk):
+                        if first_disease_ms is None:
+                            first_disease_ms = (time.monotonic() - started) * 1000
+                        streamed.append(disease)
+                        yield sse.event('disease', disease)
+                result = extractor.finish()
+            except (llm_client.LLMError, json_stream.JSONExtractionError) as e:
+                logger.error(f"AI prediction stream error: {e}")
+        if result is None:
+            fallback = True
+            result, source = fallback_prediction(symptoms, additional_info)
+        else:
+            store_cached_prediction(symptoms, additional_info, result, source)
+
+    if streamed != result.get('diseases', []):
+        if streamed:
+            logger.warning(f"Streamed diseases differ from the final result, resending {len(result.get('diseases', []))}")
+            yield sse.event('reset', {'reason': 'fallback' if fallback else 'resync'})
+        for disease in result.get('diseases', []):
+            if first_disease_ms is None:
+                first_disease_ms = (time.monotonic() - started) * 1000
+            yield sse.event('disease', disease)
+
+    try:
+        prediction = build_prediction(user, symptoms, additional_info, result, source)
+        prediction.save()
+    except Exception as e:
+        logger.error(f"Prediction stream persistence error: {e}")
+        stream_stats.record(first_disease_ms, (time.monotonic() - started) * 1000, fallback, error=True)
+        yield sse.event('error', {'error': 'Failed to generate prediction. Please try again.'})
+        return
+    stream_stats.record(first_disease_ms, (time.monotonic() - started) * 1000, fallback)
+    yield sse.event('complete', PredictionSerializer(prediction).data)
+
+def build_prediction(user, symptoms, additional_info, prediction_result, ai_model_used):
+    return Prediction(
+        user=user,
+        symptoms=symptoms,
+        additional_info=additional_info,
+        predicted_diseases=prediction_result['diseases'],
+        medications=prediction_result['medications'],
+        recommendations=prediction_result['recommendations'],
+        urgency=prediction_result['urgency'],
+        confidence_score=prediction_result.get('confidence_score', 0),
+        ai_model_used=ai_model_used
+    )
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def prediction_history(request):
     """Get user's prediction history"""
-    user = get_user_from_token(request)
-    if not user:
-        return Response({'error': 'Authentication required'}, status=status.HTTP_401_UNAUTHORIZED)
-    predictions = Prediction.objects(user=user).order_by('-created_at')
-    paginator = PredictionPagination()
+    predictions = Prediction.objects(user=request.user).only(*HISTORY_FIELDS)
+    paginator = KeysetPagination()
     page = paginator.paginate_queryset(predictions, request)
-    if page is not None:
-        serializer = PredictionHistorySerializer(page, many=True)
-        return paginator.get_paginated_response(serializer.data)
-    serializer = PredictionHistorySerializer(predictions, many=True)
-    return Response(serializer.data)
+    serializer = PredictionHistorySerializer(page, many=True)
+    return paginator.get_paginated_response(serializer.data)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def prediction_detail(request, prediction_id):
     """Get detailed prediction"""
-    user = get_user_from_token(request)
-    if not user:
-        return Response({'error': 'Authentication required'}, status=status.HTTP_401_UNAUTHORIZED)
+    user = request.user
     try:
         prediction = Prediction.objects(id=prediction_id, user=user).first()
         if not prediction:
@@ -105,63 +247,150 @@ def prediction_detail(request, prediction_id):
 @permission_classes([IsAuthenticated])
 def user_stats(request):
     """Get user prediction statistics"""
-    user = get_user_from_token(request)
-    if not user:
-        return Response({'error': 'Authentication required'}, status=status.HTTP_401_UNAUTHORIZED)
-    predictions = Prediction.objects(user=user)
-    total_predictions = predictions.count()
-    if total_predictions == 0:
-        return Response({
-            'total_predictions': 0,
-            'avg_confidence': 0,
-            'last_prediction': None,
-            'urgency_breakdown': {'low': 0, 'medium': 0, 'high': 0}
-        })
-    avg_confidence = sum([p.confidence_score or 0 for p in predictions]) / total_predictions
-    last_prediction = predictions.order_by('-created_at').first()
-    urgency_breakdown = {'low': 0, 'medium': 0, 'high': 0}
-    for prediction in predictions:
-        urgency_breakdown[prediction.urgency] += 1
+    return Response(prediction_stats.stats_response(prediction_stats.get_user_stats(request.user)))
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def predictions_metrics(request):
+    """Cache, streaming, parsing, local model, routing and Groq client statistics"""
     return Response({
-        'total_predictions': total_predictions,
-        'avg_confidence': round(avg_confidence, 1),
-        'last_prediction': last_prediction.created_at if last_prediction else None,
-        'urgency_breakdown': urgency_breakdown
+        'cache': prediction_cache.prediction_cache.stats() if prediction_cache.is_enabled() else None,
+        'semantic_cache': semantic_cache.semantic_cache.stats() if semantic_cache.is_enabled() else None,
+        'streaming': stream_stats.stats(),
+        'parsing': json_stream.parse_stats.stats('predictions'),
+        'local_model': local_model.local_predictor.stats(),
+        'routing': routing.router.stats(),
+        'llm': llm_client.get_client().stats(),
     })
 
-def extract_json_from_text(text):
-    """
-    Extract the first JSON object from mixed text, handling multi-line and text-wrapped JSON.
-    """
-    try:
-        # This matches from the first '{' to the last '}' (greedy, covers large JSON blocks)
-        match = re.search(r'\{[\s\S]*\}', text)
-        if match:
-            return json.loads(match.group())
-        else:
-            logger.error("No JSON object found in Groq API response.")
-            return None
-    except Exception as e:
-        logger.error(f"Error parsing JSON from Groq API response: {e}")
-        return None
+def validate_prediction_result(result):
+    """Schema check for parsed completions; raises ValueError/TypeError/KeyError"""
+    json_stream.require(result, {'diseases': list, 'medications': list, 'recommendations': list, 'urgency': str})
+    if result['urgency'] not in URGENCY_LEVELS:
+        raise ValueError(f"unknown urgency '{result['urgency']}'")
+    if not result['diseases']:
+        raise ValueError("no diseases")
+    for disease in result['diseases']:
+        json_stream.require(disease, {'name': str})
 
 def generate_ai_prediction(symptoms, additional_info=""):
     """
     Generate AI prediction using Groq API (with fallback).
     """
-    try:
-        if getattr(settings, 'GROQ_API_KEY', None):
-            return call_groq_api(symptoms, additional_info)
-        else:
-            return generate_mock_prediction(symptoms, additional_info)
-    except Exception as e:
-        logger.error(f"AI prediction error: {e}")
-        return generate_mock_prediction(symptoms, additional_info)
+    return run_prediction(symptoms, additional_info)[0]
 
-def call_groq_api(symptoms, additional_info):
+def run_prediction(symptoms, additional_info=""):
     """
-    Call Groq API and robustly parse disease predictions.
+    Generate a prediction and report which model produced it.
+    Returns (result, ai_model_used).
+    """
+    local_result = local_first_prediction(symptoms, additional_info)
+    if local_result is not None:
+        return local_result
+    if getattr(settings, 'GROQ_API_KEY', None):
+        if routing.is_enabled():
+            return route_prediction(symptoms, additional_info)
+        try:
+            return call_groq_api(symptoms, additional_info), GROQ_SOURCE
+        except llm_client.CircuitOpenError:
+            pass
+        except Exception as e:
+            logger.error(f"AI prediction error: {e}")
+    return fallback_prediction(symptoms, additional_info)
+
+def route_prediction(symptoms, additional_info=""):
+    """
+    Groq within the latency budget. With LOCAL_MODEL_MODE=hedge the local
+    model is raced against it after PREDICTION_HEDGE_DELAY_SECONDS (or as
+    soon as Groq fails), and a Groq answer that loses the race is still
+    cached. If no tier answers in time the usual fallback applies.
     """
+    budget = getattr(settings, 'PREDICTION_LATENCY_BUDGET_SECONDS', 10)
+    deadline = time.monotonic() + budget
+    hedge = None
+    if local_model.get_mode() == 'hedge' and local_model.local_predictor.available:
+        hedge = (LOCAL_SOURCE, lambda: local_model.local_predictor.predict(symptoms, additional_info))
+    source, result = routing.router.route(
+        (GROQ_SOURCE, lambda: call_groq_api(symptoms, additional_info, deadline=deadline)),
+        hedge=hedge,
+        budget=budget,
+        on_late=lambda late: store_cached_prediction(symptoms, additional_info, late, GROQ_SOURCE),
+    )
+    if result is None:
+        return fallback_prediction(symptoms, additional_info)
+    return result, source
+
+def local_first_prediction(symptoms, additional_info=""):
+    """
+    The local model's answer when it runs ahead of Groq: always in
+    ``primary`` mode, and in ``prefilter`` mode only for confident
+    low-urgency results. Returns (result, ai_model_used) or None.
+    """
+    mode = local_model.get_mode()
+    if mode not in ('primary', 'prefilter'):
+        return None
+    result = local_model.local_predictor.predict(symptoms, additional_info)
+    if result is None:
+        return None
+    if mode == 'primary' or local_model.is_confident(result):
+        return result, LOCAL_SOURCE
+    return None
+
+def fallback_prediction(symptoms, additional_info=""):
+    """Local model when enabled and loaded, otherwise the mock prediction"""
+    if local_model.get_mode() != 'off':
+        result = local_model.local_predictor.predict(symptoms, additional_info)
+        if result is not None:
+            return result, LOCAL_SOURCE
+    return generate_mock_prediction(symptoms, additional_info), MOCK_SOURCE
+
+def predict_with_cache(symptoms, additional_info=""):
+    """
+    Serve repeated symptom sets from the prediction cache, then near
+    duplicates from the semantic cache. Only Groq results are cached; local
+    and mock results are cheap to recompute. Returns (result, ai_model_used); cache hits are recorded as
+    ``cache:<model>`` and ``semantic-cache:<model>``.
+    """
+    cached = lookup_cached_prediction(symptoms, additional_info)
+    if cached is not None:
+        return cached
+
+    result, source = run_prediction(symptoms, additional_info)
+    if source == GROQ_SOURCE:
+        store_cached_prediction(symptoms, additional_info, result, source)
+    return result, source
+
+def lookup_cached_prediction(symptoms, additional_info=""):
+    """Return (result, ai_model_used) from the exact or semantic cache, or None"""
+    if prediction_cache.is_enabled():
+        key = prediction_cache.cache_key(symptoms, additional_info, GROQ_MODEL)
+        cached = prediction_cache.prediction_cache.get(key)
+        if cached is not None:
+            return cached['result'], f"cache:{cached['source']}"
+
+    if semantic_cache.is_enabled():
+        try:
+            cached, similarity = semantic_cache.semantic_cache.lookup(symptoms, additional_info, GROQ_MODEL)
+        except Exception as e:
+            logger.error(f"Semantic cache lookup error: {e}")
+            cached = None
+        if cached is not None:
+            logger.info(f"Semantic cache hit (similarity {similarity:.3f})")
+            return cached['result'], f"semantic-cache:{cached['source']}"
+    return None
+
+def store_cached_prediction(symptoms, additional_info, result, source):
+    entry = {'result': result, 'source': source}
+    if prediction_cache.is_enabled():
+        key = prediction_cache.cache_key(symptoms, additional_info, GROQ_MODEL)
+        prediction_cache.prediction_cache.set(key, entry)
+    if semantic_cache.is_enabled():
+        try:
+            semantic_cache.semantic_cache.add(symptoms, additional_info, entry, GROQ_MODEL)
+        except Exception as e:
+            logger.error(f"Semantic cache update error: {e}")
+
+def build_prediction_messages(symptoms, additional_info):
     prompt = f"""
 You are a medical AI assistant. Analyze the following patient symptom information carefully.
 
@@ -190,46 +419,31 @@ Return your response as a JSON object with the following structure:
   "confidence_score": 87
 }}
 """
-    headers = {
-        'Authorization': f'Bearer {settings.GROQ_API_KEY}',
-        'Content-Type': 'application/json'
-    }
-
-    data = {
-        'model': 'llama3-8b-8192',
-        'messages': [
-            {
-                'role': 'system',
-                'content': (
-                    'You are a medical AI assistant. Provide accurate medical information '
-                    'emphasizing consulting healthcare professionals.'
-                )
-            },
-            {'role': 'user', 'content': prompt}
-        ],
-        'temperature': 0.3,
-        'max_tokens': 1000
-    }
-
-    response = requests.post(
-        'https://api.groq.com/openai/v1/chat/completions',
-        headers=headers,
-        json=data,
-        timeout=30
+    return [
+        {
+            'role': 'system',
+            'content': (
+                'You are a medical AI assistant. Provide accurate medical information '
+                'emphasizing consulting healthcare professionals.'
+            )
+        },
+        {'role': 'user', 'content': prompt}
+    ]
+
+def call_groq_api(symptoms, additional_info, deadline=None):
+    """
+    Call Groq API and robustly parse disease predictions.
+    """
+    messages = build_prediction_messages(symptoms, additional_info)
+    # Raises LLMError (including CircuitOpenError while Groq is failing);
+    # run_prediction falls back to the mock prediction
+    content = llm_client.chat(
+        messages, model=GROQ_MODEL, temperature=0.3, max_tokens=1000, timeout=30, deadline=deadline
     )
-    if response.status_code == 200:
-        result = response.json()
-        content = result['choices'][0]['message']['content']
-        parsed = extract_json_from_text(content)
-        print("Parsed JSON:", parsed)  # Debugging line, remove after confirming
-        if parsed:
-            return parsed
-        else:
-            logger.error("Failed to extract JSON from Groq API response content")
-            return generate_mock_prediction(symptoms, additional_info)
-    else:
-        logger.error(f"Groq API error: {response.status_code} {response.text}")
-        return generate_mock_prediction(symptoms, additional_info)
+    try:
+        return json_stream.extract_json(content, validate_prediction_result, name='predictions')
+    except json_stream.JSONExtractionError as e:
+        raise llm_client.LLMError(f"Unusable Groq prediction: {e}")
 
 def generate_mock_prediction(symptoms, additional_info):
     """
@@ -0,0 +1,182 @@
+"""
+Dynamic micro-batching inference engine for the unified MedMNIST model
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+
+import torch
+import torch.nn.functional as F
+
+logger = logging.getLogger(__name__)
+
+# Number of recent request latencies kept for percentile reporting
+LATENCY_WINDOW = 1000
+
+
+class InferenceEngine:
+    """
+    Queues preprocessed image tensors from concurrent requests and runs them
+    through the model in batches from a single worker thread.
+
+    A batch is dispatched as soon as it holds ``max_batch_size`` images or the
+    oldest queued image has waited ``max_wait_ms``, whichever comes first.
+    """
+
+    def __init__(self, model, max_batch_size=16, max_wait_ms=10.0, name='unified'):
+        self.model = model
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.name = name
+
+        self._queue = queue.Queue()
+        self._carry = None
+        self._lock = threading.Lock()
+        self._worker = None
+        self._worker_pid = None
+
+        self._batch_sizes = Counter()
+        self._queue_depths = Counter()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._requests = 0
+        self._images = 0
+        self._errors = 0
+
+    def _ensure_worker(self):
+        """Start the worker thread lazily, and again after a fork"""
+        pid = os.getpid()
+        if self._worker is not None and self._worker.is_alive() and self._worker_pid == pid:
+            return
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive() and self._worker_pid == pid:
+                return
+            if self._worker_pid != pid:
+                self._queue = queue.Queue()
+                self._carry = None
+            self._worker = threading.Thread(
+                target=self._run, name=f'inference-{self.name}', daemon=True
+            )
+            self._worker_pid = pid
+            self._worker.start()
+
+    def submit(self, tensor):
+        """
+        Queue a tensor of shape (C, H, W) or (N, C, H, W) for inference.
+        Returns a Future resolving to one result dict per image.
+        """
+        if tensor.dim() == 3:
+            tensor = tensor.unsqueeze(0)
+        future = Future()
+        self._ensure_worker()
+        self._queue.put((tensor, future, time.perf_counter()))
+        return future
+
+    def predict(self, tensor, timeout=None):
+        """Run a single image through the model and return its result"""
+        return self.submit(tensor).result(timeout=timeout)[0]
+
+    def predict_batch(self, tensor, timeout=None):
+        """Run a stack of images through the model and return one result per image"""
+        return self.submit(tensor).result(timeout=timeout)
+
+    def _collect(self):
+        """Block for the first request, then gather more until the batch is full or the wait expires"""
+        if self._carry is not None:
+            first, self._carry = self._carry, None
+        else:
+            first = self._queue.get()
+        items = [first]
+        size = first[0].shape[0]
+        deadline = time.perf_counter() + self.max_wait
+
+        while size < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining <= 0:
+                    item = self._queue.get_nowait()
+                else:
+                    item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if size + item[0].shape[0] > self.max_batch_size:
+                # Keep requests whole; this one leads the next batch
+                self._carry = item
+                break
+            items.append(item)
+            size += item[0].shape[0]
+        return items, size
+
+    def _run(self):
+        while True:
+            items, size = self._collect()
+            depth = self._queue.qsize()
+            try:
+                if len(items) == 1:
+                    batch = items[0][0]
+                else:
+                    batch = torch.cat([tensor for tensor, _, _ in items], dim=0)
+                with torch.no_grad():
+                    probs = F.softmax(self.model(batch), dim=1)
+                    confidences, classes = torch.max(probs, dim=1)
+            except Exception as e:
+                logger.error(f"Batched inference error: {e}")
+                with self._lock:
+                    self._errors += len(items)
+                for _, future, _ in items:
+                    future.set_exception(e)
+                continue
+
+            finished = time.perf_counter()
+            offset = 0
+            with self._lock:
+                self._batch_sizes[size] += 1
+                self._queue_depths[depth] += 1
+                self._requests += len(items)
+                self._images += size
+                for tensor, _, enqueued in items:
+                    self._latencies.append((finished - enqueued) * 1000)
+
+            for tensor, future, _ in items:
+                count = tensor.shape[0]
+                future.set_result([
+                    {
+                        'class_index': int(classes[i]),
+                        'confidence': float(confidences[i]) * 100,
+                        'probabilities': probs[i],
+                    }
+                    for i in range(offset, offset + count)
+                ])
+                offset += count
+
+    def stats(self):
+        """Queue depth, batch-size histogram and latency percentiles"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            batches = sum(self._batch_sizes.values())
+
+            def percentile(p):
+                if not latencies:
+                    return None
+                return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 2)
+
+            return {
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000,
+                'queue_depth': self._queue.qsize(),
+                'requests': self._requests,
+                'images': self._images,
+                'batches': batches,
+                'errors': self._errors,
+                'avg_batch_size': round(self._images / batches, 2) if batches else 0,
+                'batch_size_histogram': dict(sorted(self._batch_sizes.items())),
+                'queue_depth_histogram': dict(sorted(self._queue_depths.items())),
+                'latency_ms': {
+                    'p50': percentile(0.50),
+                    'p95': percentile(0.95),
+                    'p99': percentile(0.99),
+                },
+            }
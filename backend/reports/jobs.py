@@ -0,0 +1,173 @@
+"""
+Local worker pool for asynchronous report analysis jobs
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+from .models import MedicalReport
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ('completed', 'failed')
+ACTIVE_STATUSES = ('pending', 'processing')
+STALE_JOB_ERROR = 'Analysis was interrupted, please resubmit'
+
+
+class JobQueueFull(Exception):
+    """Raised when the local pool already holds REPORT_JOB_MAX_PENDING jobs"""
+
+
+class ReportJobRunner:
+    """
+    Runs report analyses on a bounded thread pool. Job state lives on the
+    MedicalReport document so any worker process can answer status polls;
+    in-process events let server-sent event streams wake as soon as a job
+    finishes.
+    """
+
+    def __init__(self, max_workers=2, max_pending=32):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._events = {}
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def _get_executor(self):
+        pid = os.getpid()
+        with self._lock:
+            if self._executor is None or self._pid != pid:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='report-job')
+                self._pid = pid
+                self._events = {}
+            return self._executor
+
+    @property
+    def in_flight(self):
+        return len(self._events)
+
+    def submit(self, report, files, report_type, notes):
+        """
+        Queue analysis of an already saved pending report. Upload bytes are
+        read now because request files are closed once the response is sent.
+        """
+        executor = self._get_executor()
+        report_id = str(report.id)
+        with self._lock:
+            if len(self._events) >= self.max_pending:
+                self.rejected += 1
+                raise JobQueueFull()
+            self._events[report_id] = threading.Event()
+            self.submitted += 1
+        try:
+            payloads = [(file.name, file.read()) for file in files]
+        except Exception:
+            with self._lock:
+                self._events.pop(report_id, None)
+            raise
+        executor.submit(self._run, report_id, payloads, report_type, notes)
+        return report_id
+
+    def _run(self, report_id, payloads, report_type, notes):
+        from .views import analyze_with_cache
+
+        MedicalReport.objects(id=report_id).update_one(set__status='processing')
+        try:
+            files = [ContentFile(data, name=name) for name, data in payloads]
+            result, _ = analyze_with_cache(report_type, files, notes)
+            MedicalReport.objects(id=report_id).update_one(
+                set__findings=result['findings'],
+                set__recommendations=result['recommendations'],
+                set__urgency=result['urgency'],
+                set__summary=result['summary'],
+                set__confidence_score=result.get('confidence', 0),
+                set__status='completed',
+                set__completed_at=datetime.utcnow(),
+            )
+            with self._lock:
+                self.completed += 1
+        except Exception as e:
+            logger.error(f"Report job {report_id} failed: {e}")
+            MedicalReport.objects(id=report_id).update_one(
+                set__status='failed',
+                set__error='Analysis failed',
+                set__completed_at=datetime.utcnow(),
+            )
+            with self._lock:
+                self.failed += 1
+        finally:
+            with self._lock:
+                event = self._events.pop(report_id, None)
+            if event is not None:
+                event.set()
+
+    def wait(self, report_id, timeout):
+        """
+        Block until a job running in this process finishes or the timeout
+        passes. Returns False straight away for jobs owned by another process.
+        """
+        event = self._events.get(report_id)
+        if event is None:
+            return False
+        event.wait(timeout)
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'max_pending': self.max_pending,
+                'in_flight': len(self._events),
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+            }
+
+
+def stale_cutoff():
+    return datetime.utcnow() - timedelta(minutes=getattr(settings, 'REPORT_JOB_STALE_MINUTES', 15))
+
+
+def expire_stale_jobs(cutoff=None):
+    """
+    Mark pending/processing jobs created before ``cutoff`` as failed. Jobs
+    live on a worker's thread pool, so a recycled or crashed worker leaves
+    them unfinished forever. Returns the number of jobs expired.
+    """
+    cutoff = cutoff or stale_cutoff()
+    return MedicalReport.objects(status__in=ACTIVE_STATUSES, created_at__lt=cutoff).update(
+        set__status='failed',
+        set__error=STALE_JOB_ERROR,
+        set__completed_at=datetime.utcnow(),
+    )
+
+
+def expire_if_stale(report):
+    """Fail a single unfinished job that is past REPORT_JOB_STALE_MINUTES; returns True if it did"""
+    if report.status not in ACTIVE_STATUSES or report.created_at is None or report.created_at >= stale_cutoff():
+        return False
+    expired = MedicalReport.objects(id=report.id, status__in=ACTIVE_STATUSES).update_one(
+        set__status='failed',
+        set__error=STALE_JOB_ERROR,
+        set__completed_at=datetime.utcnow(),
+    )
+    if expired:
+        logger.warning(f"Report job {report.id} was never finished, marked as failed")
+    return bool(expired)
+
+
+job_runner = ReportJobRunner(
+    max_workers=getattr(settings, 'REPORT_JOB_WORKERS', 2),
+    max_pending=getattr(settings, 'REPORT_JOB_MAX_PENDING', 32),
+)
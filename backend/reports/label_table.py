@@ -0,0 +1,82 @@
+"""
+Versioned lookup table of urgency, display label and recommendations for
+each MedMNIST class, built offline by `manage.py build_label_table`
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+
+from django.conf import settings
+
+from .model_registry import get_labels_path, get_models_dir
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TABLE_FILE = 'medmnist_label_table.json'
+URGENCY_LEVELS = ('low', 'medium', 'high')
+
+_table = None
+_table_loaded = False
+_lock = threading.Lock()
+
+
+def get_table_path():
+    return getattr(settings, 'MEDMNIST_LABEL_TABLE_PATH', '') or os.path.join(get_models_dir(), DEFAULT_TABLE_FILE)
+
+
+def labels_digest(path=None):
+    """Digest of the labels file; a table built for other labels is ignored"""
+    with open(path or get_labels_path(), 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+
+def load_table(path=None):
+    """Read and validate a table file. Returns None if missing, stale or invalid."""
+    path = path or get_table_path()
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r') as f:
+            table = json.load(f)
+        if table.get('labels_digest') != labels_digest():
+            logger.warning(f"Label table {path} was built for a different labels file, ignoring it")
+            return None
+        entries = table['entries']
+        for raw_label, entry in entries.items():
+            if entry.get('urgency') not in URGENCY_LEVELS or not entry.get('human_label'):
+                raise ValueError(f"invalid entry for {raw_label!r}")
+        logger.info(f"Loaded label table {table.get('version')} with {len(entries)} entries")
+        return table
+    except Exception as e:
+        logger.error(f"Could not load label table {path}: {e}")
+        return None
+
+
+def get_table():
+    global _table, _table_loaded
+    if not _table_loaded:
+        with _lock:
+            if not _table_loaded:
+                _table = load_table()
+                _table_loaded = True
+    return _table
+
+
+def lookup(raw_label):
+    """Table entry for a raw class label, or None when the table has no answer"""
+    table = get_table()
+    if table is None:
+        return None
+    return table['entries'].get(raw_label)
+
+
+def table_version():
+    table = get_table()
+    return table.get('version') if table else None
+
+
+def use_llm_override():
+    """REPORT_URGENCY_SOURCE=llm forces the runtime Groq urgency call"""
+    return getattr(settings, 'REPORT_URGENCY_SOURCE', 'table') == 'llm'
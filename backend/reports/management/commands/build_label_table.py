@@ -0,0 +1,99 @@
+"""
+Build the versioned per-label table used by image report analysis.
+
+    python manage.py build_label_table --table-version 2024-06
+"""
+import json
+import os
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from backend import json_stream, llm_client
+from reports import label_table
+from reports.model_registry import registry
+from reports.views import TEXT_MODEL, human_label
+
+LABEL_PROMPT = """
+The medical image classifier label "{raw_label}" (roughly: "{pretty_label}") is shown to patients.
+Return ONLY a JSON object with:
+- "human_label": a short patient-friendly name for this finding (e.g. "Normal chest", "Pneumonia")
+- "urgency": the recommended patient urgency, one of "low", "medium" or "high"
+- "recommendations": 2-3 short, general next steps for the patient
+"""
+
+
+def validate_label_entry(entry):
+    json_stream.require(entry, {'human_label': str, 'urgency': str, 'recommendations': list})
+    if entry['urgency'] not in label_table.URGENCY_LEVELS:
+        raise ValueError(f"unknown urgency '{entry['urgency']}'")
+    if not entry['human_label'].strip():
+        raise ValueError("empty human_label")
+    if not entry['recommendations'] or not all(isinstance(r, str) and r.strip() for r in entry['recommendations']):
+        raise ValueError("recommendations must be non-empty strings")
+
+
+def generate_entry(raw_label):
+    """Ask Groq for the display label, urgency and recommendations of one class; None on failure"""
+    prompt = LABEL_PROMPT.format(raw_label=raw_label, pretty_label=human_label(raw_label))
+    try:
+        content = llm_client.chat(
+            [{"role": "system", "content": "Medical AI"}, {"role": "user", "content": prompt}],
+            model=TEXT_MODEL, temperature=0.0, max_tokens=200, timeout=30
+        )
+        entry = json_stream.extract_json(content, validate_label_entry, name='label_table')
+    except (llm_client.LLMError, json_stream.JSONExtractionError) as e:
+        return None, str(e)
+    return {
+        'human_label': entry['human_label'].strip(),
+        'urgency': entry['urgency'],
+        'recommendations': [r.strip() for r in entry['recommendations']],
+    }, None
+
+
+class Command(BaseCommand):
+    help = "Generate urgency, display label and recommendations for every MedMNIST class"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--table-version', default=None, help="table version (defaults to a UTC timestamp)")
+        parser.add_argument('--output', default=None, help="defaults to MEDMNIST_LABEL_TABLE_PATH")
+        parser.add_argument('--keep-existing', action='store_true',
+                            help="reuse entries from the current table and only query new labels")
+
+    def handle(self, *args, **options):
+        if not getattr(settings, 'GROQ_API_KEY', None):
+            raise CommandError("GROQ_API_KEY is required to build the label table")
+
+        output = options['output'] or label_table.get_table_path()
+        existing = {}
+        if options['keep_existing'] and os.path.exists(output):
+            with open(output, 'r') as f:
+                existing = json.load(f).get('entries', {})
+
+        entries = {}
+        failed = []
+        for raw_label in registry.get_labels():
+            if raw_label in existing:
+                entries[raw_label] = existing[raw_label]
+                continue
+            entry, error = generate_entry(raw_label)
+            if entry is None:
+                self.stderr.write(f"{raw_label}: {error}")
+                failed.append(raw_label)
+                continue
+            entries[raw_label] = entry
+            self.stdout.write(f"{raw_label}: {entry['human_label']} ({entry['urgency']})")
+
+        if failed:
+            raise CommandError(f"Groq gave no valid entry for: {', '.join(failed)}")
+
+        table = {
+            'version': options['table_version'] or datetime.utcnow().strftime('%Y%m%d%H%M%S'),
+            'generated_at': datetime.utcnow().isoformat() + 'Z',
+            'labels_digest': label_table.labels_digest(),
+            'entries': entries,
+        }
+        with open(output, 'w') as f:
+            json.dump(table, f, indent=2, sort_keys=True)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(entries)} labels to {output} (version {table['version']})"))
@@ -0,0 +1,29 @@
+"""
+Mark async report jobs that never finished as failed.
+
+    python manage.py expire_report_jobs --older-than 15
+
+Run it periodically (e.g. from cron); jobs are also expired lazily when
+their status is polled.
+"""
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand
+
+from reports.jobs import expire_stale_jobs, stale_cutoff
+
+
+class Command(BaseCommand):
+    help = "Fail pending/processing report jobs older than REPORT_JOB_STALE_MINUTES"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, default=None,
+                            help="minutes (defaults to REPORT_JOB_STALE_MINUTES)")
+
+    def handle(self, *args, **options):
+        if options['older_than'] is not None:
+            cutoff = datetime.utcnow() - timedelta(minutes=options['older_than'])
+        else:
+            cutoff = stale_cutoff()
+        expired = expire_stale_jobs(cutoff)
+        self.stdout.write(self.style.SUCCESS(f"Expired {expired} unfinished report jobs created before {cutoff:%Y-%m-%d %H:%M:%S} UTC"))
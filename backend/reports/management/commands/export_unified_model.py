@@ -0,0 +1,88 @@
+"""
+Export an int8 CPU build of the unified MedMNIST model and check its accuracy
+against the fp32 weights.
+
+    python manage.py export_unified_model --calibration-dir data/calib --eval-dir data/heldout
+"""
+import itertools
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reports import quantization
+from reports.model_registry import get_model_path, get_models_dir, registry
+
+
+class Command(BaseCommand):
+    help = "Export a quantized TorchScript/ONNX build of the unified report model"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=['static', 'dynamic'], default='static',
+                            help="static quantizes convolutions (needs calibration images); dynamic only the classifier")
+        parser.add_argument('--format', choices=['torchscript', 'onnx', 'both'], default='torchscript')
+        parser.add_argument('--weights', default=None, help="fp32 state dict (defaults to MEDMNIST_MODEL_PATH)")
+        parser.add_argument('--output-dir', default=None, help="defaults to MEDMNIST_MODELS_DIR")
+        parser.add_argument('--calibration-dir', default=None, help="images used to calibrate activation ranges")
+        parser.add_argument('--calibration-limit', type=int, default=512)
+        parser.add_argument('--eval-dir', default=None,
+                            help="held-out images; sub-directories named by class index or label are scored for accuracy")
+        parser.add_argument('--eval-limit', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        weights = options['weights'] or get_model_path()
+        output_dir = options['output_dir'] or get_models_dir()
+        if not os.path.exists(weights):
+            raise CommandError(f"Weights not found: {weights}")
+
+        labels = registry.get_labels()
+        num_classes = len(labels)
+        reference = quantization.load_fp32_model(weights, num_classes)
+
+        if options['mode'] == 'static':
+            if not options['calibration_dir']:
+                raise CommandError("--calibration-dir is required for static quantization")
+            samples = itertools.islice(
+                quantization.iter_image_dir(options['calibration_dir'], labels),
+                options['calibration_limit'],
+            )
+            calibration = quantization.batched(tensor for tensor, _ in samples)
+            quantized = quantization.quantize_static(
+                quantization.load_quantizable_model(weights, num_classes), calibration
+            )
+        else:
+            quantized = quantization.quantize_dynamic(quantization.load_fp32_model(weights, num_classes))
+
+        exported = []
+        if options['format'] in ('torchscript', 'both'):
+            path = os.path.join(output_dir, 'medmnist_unified_model.int8.pt')
+            quantization.export_torchscript(quantized, path)
+            exported.append(('torchscript', path))
+        if options['format'] in ('onnx', 'both'):
+            path = os.path.join(output_dir, 'medmnist_unified_model.int8.onnx')
+            quantization.export_onnx(quantization.load_fp32_model(weights, num_classes), path)
+            exported.append(('onnx', path))
+
+        fp32_size = os.path.getsize(weights) / 1e6
+        for fmt, path in exported:
+            self.stdout.write(self.style.SUCCESS(
+                f"Exported {fmt}: {path} ({os.path.getsize(path) / 1e6:.1f} MB, fp32 {fp32_size:.1f} MB)"
+            ))
+
+        if not options['eval_dir']:
+            self.stdout.write("No --eval-dir given, skipping accuracy check")
+            return
+
+        for fmt, path in exported:
+            if fmt == 'onnx':
+                candidate = quantization.OnnxModel(path)
+            else:
+                import torch
+                candidate = torch.jit.load(path, map_location='cpu')
+            samples = itertools.islice(
+                quantization.iter_image_dir(options['eval_dir'], labels), options['eval_limit']
+            )
+            report = quantization.compare_models(reference, candidate, samples)
+            if report is None:
+                raise CommandError(f"No images found in {options['eval_dir']}")
+            self.stdout.write(f"{fmt} vs fp32: {json.dumps(report, indent=2)}")
@@ -2,9 +2,13 @@ import torch
 from torchvision import transforms
 from PIL import Image
 import numpy as np
-from tensorflow.keras.models import load_model
 import torch.nn as nn
 import os
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
 
 device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
@@ -39,10 +43,96 @@ class SimpleCNN(nn.Module):
         x = x.view(x.size(0), -1)
         return self.classifier(x)
 
+# === Model loading ===
+def load_report_model(report_type):
+    if report_type == "brain_mri":
+        from tensorflow.keras.models import load_model
+        return load_model(MODEL_PATHS["brain_mri"])
+
+    num_classes = 2 if report_type == "breast" else 3 if report_type == "brain" else 11
+    model = SimpleCNN(out_classes=num_classes).to(device)
+    model.load_state_dict(torch.load(MODEL_PATHS[report_type], map_location=device))
+    model.eval()
+    return model
+
+# === Per-process model cache ===
+class ModelCache:
+    """
+    Bounded LRU cache of loaded models keyed by report type, so repeated
+    calls only pay for the forward pass.
+    """
+
+    def __init__(self, max_size=4, loader=load_report_model):
+        self.max_size = max(1, max_size)
+        self.loader = loader
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_seconds = {}
+
+    def get(self, report_type):
+        with self._lock:
+            if report_type in self._models:
+                self._models.move_to_end(report_type)
+                self.hits += 1
+                return self._models[report_type]
+            key_lock = self._key_locks.setdefault(report_type, threading.Lock())
+
+        # Load outside the cache lock so other report types are not blocked,
+        # but only once per report type
+        with key_lock:
+            with self._lock:
+                if report_type in self._models:
+                    self._models.move_to_end(report_type)
+                    self.hits += 1
+                    return self._models[report_type]
+                self.misses += 1
+
+            start = time.perf_counter()
+            model = self.loader(report_type)
+            elapsed = time.perf_counter() - start
+
+            with self._lock:
+                self.load_seconds[report_type] = round(elapsed, 3)
+                self._models[report_type] = model
+                self._models.move_to_end(report_type)
+                while len(self._models) > self.max_size:
+                    self._models.popitem(last=False)
+                    self.evictions += 1
+            return model
+
+    def preload(self, report_types=None):
+        """Load models ahead of the first request"""
+        for report_type in report_types or MODEL_PATHS.keys():
+            self.get(report_type)
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "cached": list(self._models.keys()),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0,
+                "load_seconds": dict(self.load_seconds),
+            }
+
+model_cache = ModelCache(max_size=getattr(settings, 'REPORT_MODEL_CACHE_SIZE', 4))
+
 # === Image-based model inference ===
 def run_image_model(report_type, image_path):
+    model = model_cache.get(report_type)
+
     if report_type == "brain_mri":
-        model = load_model(MODEL_PATHS["brain_mri"])
         img = Image.open(image_path).resize((64, 64))
         img_array = np.array(img.convert("L")) / 255.0
         img_array = img_array.reshape(1, 64, 64, 1)
@@ -52,11 +142,6 @@ def run_image_model(report_type, image_path):
         return {"prediction": label, "confidence": confidence}
 
     # For PyTorch models
-    num_classes = 2 if report_type == "breast" else 3 if report_type == "brain" else 11
-    model = SimpleCNN(out_classes=num_classes).to(device)
-    model.load_state_dict(torch.load(MODEL_PATHS[report_type], map_location=device))
-    model.eval()
-
     image = Image.open(image_path)
     img_tensor = transform(image).unsqueeze(0).to(device)
 
@@ -0,0 +1,172 @@
+"""
+Lazy, process-wide registry for the unified MedMNIST model and its labels
+"""
+import hashlib
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models')
+DEFAULT_MODEL_FILE = 'medmnist_unified_model.pth'
+DEFAULT_LABELS_FILE = 'medmnist_global_labels.txt'
+EXPORTED_MODEL_FILES = {
+    'torchscript': 'medmnist_unified_model.int8.pt',
+    'onnx': 'medmnist_unified_model.int8.onnx',
+}
+
+
+def _setting(name, default):
+    """Read a setting, falling back to the default outside a configured Django process"""
+    try:
+        return getattr(settings, name, None) or default
+    except ImproperlyConfigured:
+        return default
+
+
+def get_models_dir():
+    return str(_setting('MEDMNIST_MODELS_DIR', DEFAULT_MODELS_DIR))
+
+
+def get_model_path():
+    return str(_setting('MEDMNIST_MODEL_PATH', os.path.join(get_models_dir(), DEFAULT_MODEL_FILE)))
+
+
+def get_model_backend():
+    """eager (fp32 state dict), torchscript or onnx (exported int8 builds)"""
+    return str(_setting('MEDMNIST_MODEL_BACKEND', 'eager')).lower()
+
+
+def get_exported_model_path(backend=None):
+    backend = backend or get_model_backend()
+    default = os.path.join(get_models_dir(), EXPORTED_MODEL_FILES.get(backend, ''))
+    return str(_setting('MEDMNIST_EXPORTED_MODEL_PATH', default))
+
+
+def get_labels_path():
+    return str(_setting('MEDMNIST_LABELS_PATH', os.path.join(get_models_dir(), DEFAULT_LABELS_FILE)))
+
+
+def load_class_labels(path):
+    """Load class labels from the file generated during training"""
+    with open(path, "r") as f:
+        return [line.strip().split(',', 1)[1] for line in f if line.strip()]
+
+
+def create_unified_resnet18(in_channels=1, num_classes=None):
+    """Create the unified ResNet18 model architecture"""
+    import torch.nn as nn
+    from torchvision import models
+
+    if num_classes is None:
+        num_classes = len(registry.get_labels())
+    model = models.resnet18(weights=None)
+    model.conv1 = nn.Conv2d(in_channels, 64, kernel_size=7, stride=2, padding=3, bias=False)
+    model.fc = nn.Linear(model.fc.in_features, num_classes)
+    return model
+
+
+class ModelRegistry:
+    """
+    Resolves model and label artifacts from settings and loads them on first
+    use (or at warmup). One instance is shared by every request in the process.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._labels = None
+        self._model = None
+        self._engine = None
+        self._version = None
+
+    def get_labels(self):
+        if self._labels is None:
+            with self._lock:
+                if self._labels is None:
+                    path = get_labels_path()
+                    self._labels = load_class_labels(path)
+                    logger.info(f"Loaded {len(self._labels)} MedMNIST labels from {path}")
+        return self._labels
+
+    def get_model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = self._load_model(get_model_backend())
+        return self._model
+
+    def _load_model(self, backend):
+        import torch
+
+        if backend == 'torchscript':
+            from .quantization import get_quantized_engine
+
+            torch.backends.quantized.engine = get_quantized_engine()
+            path = get_exported_model_path(backend)
+            model = torch.jit.load(path, map_location='cpu')
+        elif backend == 'onnx':
+            from .quantization import OnnxModel
+
+            path = get_exported_model_path(backend)
+            model = OnnxModel(path)
+        else:
+            path = get_model_path()
+            model = create_unified_resnet18(num_classes=len(self.get_labels()))
+            model.load_state_dict(torch.load(path, map_location='cpu'))
+        model.eval()
+        logger.info(f"Loaded unified model ({backend}) from {path}")
+        return model
+
+    def get_engine(self):
+        """Batching inference engine bound to the unified model"""
+        if self._engine is None:
+            with self._lock:
+                if self._engine is None:
+                    from .inference import InferenceEngine
+
+                    self._engine = InferenceEngine(
+                        self.get_model(),
+                        max_batch_size=getattr(settings, 'REPORTS_INFERENCE_MAX_BATCH_SIZE', 16),
+                        max_wait_ms=getattr(settings, 'REPORTS_INFERENCE_MAX_WAIT_MS', 10),
+                    )
+        return self._engine
+
+    def get_model_version(self):
+        """
+        Identifier of the weights being served: MEDMNIST_MODEL_VERSION if set,
+        otherwise a digest of the backend and artifact contents.
+        """
+        if self._version is None:
+            with self._lock:
+                if self._version is None:
+                    version = _setting('MEDMNIST_MODEL_VERSION', '')
+                    if not version:
+                        backend = get_model_backend()
+                        path = get_model_path() if backend == 'eager' else get_exported_model_path(backend)
+                        digest = hashlib.sha256(backend.encode())
+                        with open(path, 'rb') as f:
+                            for chunk in iter(lambda: f.read(1 << 20), b''):
+                                digest.update(chunk)
+                        version = f"{backend}-{digest.hexdigest()[:12]}"
+                    self._version = version
+        return self._version
+
+    @property
+    def engine_started(self):
+        return self._engine is not None
+
+    def warmup(self):
+        """Load labels, weights and the inference engine ahead of the first request"""
+        try:
+            self.get_engine()
+        except Exception as e:
+            logger.error(f"Model warmup failed: {e}")
+            return False
+        return True
+
+
+registry = ModelRegistry()
@@ -14,11 +14,16 @@ class MedicalReport(Document):
     file_names = ListField(StringField())
     additional_notes = StringField()
     
-    # AI Analysis Results
-    findings = ListField(DictField(), required=True)
+    # AI Analysis Results (empty while an async job is pending)
+    findings = ListField(DictField())
     recommendations = ListField(StringField())
-    urgency = StringField(choices=['low', 'medium', 'high'], required=True)
-    summary = StringField(required=True)
+    urgency = StringField(choices=['low', 'medium', 'high'])
+    summary = StringField()
+    
+    # Async job state; synchronous analyses are saved as completed
+    status = StringField(choices=['pending', 'processing', 'completed', 'failed'], default='completed')
+    error = StringField()
+    completed_at = DateTimeField()
     
     # Metadata
     created_at = DateTimeField(default=datetime.utcnow)
@@ -0,0 +1,295 @@
+"""
+Multi-page OCR for text reports on a bounded process pool
+"""
+import io
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+from PIL import Image, ImageOps, ImageSequence
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DESKEW_MAX_ANGLE = 5.0
+DESKEW_STEP = 0.5
+DESKEW_SAMPLE_SIDE = 800
+
+
+# === Page extraction ===
+def iter_pages(files, max_pages=None):
+    """
+    Yield every page of every upload as a PIL image: each file, each frame of
+    multi-frame TIFFs and each page of PDFs (rendered with pdf2image when it
+    is installed).
+    """
+    count = 0
+    for file in files:
+        if isinstance(file, Image.Image):
+            pages = [file]
+        else:
+            file.seek(0)
+            data = file.read()
+            file.seek(0)
+            if data[:5] == b'%PDF-':
+                pages = _pdf_pages(data, getattr(file, 'name', 'upload.pdf'))
+            else:
+                image = Image.open(io.BytesIO(data))
+                pages = (frame.copy() for frame in ImageSequence.Iterator(image))
+        for page in pages:
+            if max_pages is not None and count >= max_pages:
+                logger.warning(f"OCR page limit of {max_pages} reached, skipping remaining pages")
+                return
+            count += 1
+            yield page
+
+
+def _pdf_pages(data, name):
+    try:
+        from pdf2image import convert_from_bytes
+    except ImportError:
+        logger.error(f"pdf2image not installed, cannot OCR {name}")
+        return []
+    return convert_from_bytes(data, dpi=getattr(settings, 'OCR_PDF_DPI', 200))
+
+
+# === Preprocessing (runs in worker processes) ===
+def otsu_threshold(pixels):
+    histogram = np.bincount(pixels.ravel(), minlength=256).astype(np.float64)
+    total = pixels.size
+    cumulative = np.cumsum(histogram)
+    cumulative_mean = np.cumsum(histogram * np.arange(256))
+    background = cumulative
+    foreground = total - cumulative
+    valid = (background > 0) & (foreground > 0)
+    mean_bg = np.where(valid, cumulative_mean / np.maximum(background, 1), 0)
+    mean_fg = np.where(valid, (cumulative_mean[-1] - cumulative_mean) / np.maximum(foreground, 1), 0)
+    variance = background * foreground * (mean_bg - mean_fg) ** 2
+    return int(np.argmax(np.where(valid, variance, 0)))
+
+
+def estimate_skew(binary):
+    """
+    Projection-profile deskew: the rotation that makes text rows sharpest
+    maximises the variance of the ink-per-row profile.
+    """
+    sample = binary.copy()
+    sample.thumbnail((DESKEW_SAMPLE_SIDE, DESKEW_SAMPLE_SIDE))
+    ink = ImageOps.invert(sample)
+    best_angle, best_score = 0.0, -1.0
+    for angle in np.arange(-DESKEW_MAX_ANGLE, DESKEW_MAX_ANGLE + DESKEW_STEP / 2, DESKEW_STEP):
+        rotated = np.asarray(ink.rotate(float(angle), fillcolor=0), dtype=np.float32)
+        score = float(np.var(rotated.sum(axis=1)))
+        if score > best_score:
+            best_angle, best_score = float(angle), score
+    return best_angle
+
+
+def preprocess_page(page, max_side):
+    """Grayscale, downscale, binarize and deskew a page for Tesseract"""
+    image = page.convert('L')
+    if max(image.size) > max_side:
+        image.thumbnail((max_side, max_side))
+    image = ImageOps.autocontrast(image)
+    pixels = np.asarray(image)
+    threshold = otsu_threshold(pixels)
+    binary = Image.fromarray(np.where(pixels > threshold, 255, 0).astype(np.uint8))
+    angle = estimate_skew(binary)
+    if angle:
+        binary = binary.rotate(angle, expand=True, fillcolor=255)
+    return binary
+
+
+def ocr_page(index, page, max_side, timeout=0):
+    """
+    Worker entry point: returns (index, text, timings). Tesseract is killed
+    after ``timeout`` seconds (0 for no limit) so a stuck page frees its worker.
+    """
+    import pytesseract
+
+    start = time.perf_counter()
+    prepared = preprocess_page(page, max_side)
+    prepared_at = time.perf_counter()
+    text = pytesseract.image_to_string(prepared, timeout=timeout)
+    finished = time.perf_counter()
+    return index, text, {
+        'preprocess_ms': round((prepared_at - start) * 1000, 1),
+        'ocr_ms': round((finished - prepared_at) * 1000, 1),
+    }
+
+
+# === Pool ===
+def get_mp_context():
+    """
+    Workers are started from a forkserver (spawn where that is unavailable)
+    rather than forked from the multi-threaded server process, whose other
+    threads may hold locks a forked child would inherit.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+class OCRPool:
+    """
+    Process pool capped at OCR_MAX_PROCESSES, recreated after a fork, after
+    a worker died and broke it, or after a document ran out of time
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.pages = 0
+        self.failures = 0
+        self.restarts = 0
+        self.timeouts = 0
+        self.preprocess_ms = 0.0
+        self.ocr_ms = 0.0
+
+    def get_executor(self):
+        pid = os.getpid()
+        with self._lock:
+            if self._executor is None or self._pid != pid:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=getattr(settings, 'OCR_MAX_PROCESSES', 2),
+                    mp_context=get_mp_context(),
+                )
+                self._pid = pid
+            return self._executor
+
+    def reset_executor(self, executor, reason):
+        """Replace ``executor`` so the next page starts on fresh workers"""
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+            self.restarts += 1
+        logger.warning(f"Restarting the OCR process pool: {reason}")
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, executor, index, page, max_side, page_timeout):
+        try:
+            return executor, executor.submit(ocr_page, index, page, max_side, page_timeout)
+        except BrokenProcessPool:
+            self.reset_executor(executor, "a worker died")
+            executor = self.get_executor()
+            return executor, executor.submit(ocr_page, index, page, max_side, page_timeout)
+
+    def stream(self, pages):
+        """
+        OCR pages in parallel and yield (index, text, timings) as each page
+        completes, not in page order. Pages are submitted as ``pages``
+        produces them. The document gets OCR_TIMEOUT seconds overall and each
+        Tesseract call OCR_PAGE_TIMEOUT; failed or unfinished pages are
+        skipped and the pages read so far are still returned.
+        """
+        max_side = getattr(settings, 'OCR_MAX_SIDE', 2500)
+        page_timeout = getattr(settings, 'OCR_PAGE_TIMEOUT', 30)
+        timeout = getattr(settings, 'OCR_TIMEOUT', 60)
+        deadline = time.monotonic() + timeout
+        executor = self.get_executor()
+        pending = {}
+        timed_out = False
+
+        for index, page in enumerate(pages):
+            if time.monotonic() >= deadline:
+                timed_out = True
+                break
+            executor, future = self.submit(executor, index, page, max_side, page_timeout)
+            pending[future] = index
+            yield from self._collect([future for future in pending if future.done()], pending, executor)
+
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                timed_out = True
+                break
+            done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            yield from self._collect(done, pending, executor)
+
+        if timed_out:
+            logger.error(f"OCR timed out after {timeout}s, continuing with the pages read so far")
+            with self._lock:
+                self.timeouts += 1
+                self.failures += len(pending)
+            # Running pages would keep the workers busy for the next document
+            self.reset_executor(executor, "document timed out")
+
+    def _collect(self, done, pending, executor):
+        for future in done:
+            index = pending.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.error(f"OCR failed for page {index + 1}: {e}")
+                if isinstance(e, BrokenProcessPool):
+                    self.reset_executor(executor, "a worker died")
+                with self._lock:
+                    self.failures += 1
+                continue
+            timings = result[2]
+            logger.info(f"OCR page {index + 1}: preprocess {timings['preprocess_ms']} ms, tesseract {timings['ocr_ms']} ms")
+            with self._lock:
+                self.pages += 1
+                self.preprocess_ms += timings['preprocess_ms']
+                self.ocr_ms += timings['ocr_ms']
+            yield result
+
+    def stats(self):
+        with self._lock:
+            return {
+                'max_processes': getattr(settings, 'OCR_MAX_PROCESSES', 2),
+                'pages': self.pages,
+                'failures': self.failures,
+                'restarts': self.restarts,
+                'timeouts': self.timeouts,
+                'avg_preprocess_ms': round(self.preprocess_ms / self.pages, 1) if self.pages else 0,
+                'avg_ocr_ms': round(self.ocr_ms / self.pages, 1) if self.pages else 0,
+            }
+
+
+ocr_pool = OCRPool()
+
+
+# === Prompt building ===
+class ReportTextBuilder:
+    """
+    Collects page text as pages complete and renders it in page order,
+    truncated to a character budget so long reports keep the prompt bounded.
+    """
+
+    def __init__(self, max_chars=None):
+        self.max_chars = max_chars or getattr(settings, 'OCR_MAX_PROMPT_CHARS', 12000)
+        self.pages = {}
+
+    def add(self, index, text):
+        text = text.strip()
+        if text:
+            self.pages[index] = text
+
+    def build(self, notes=''):
+        parts = []
+        remaining = self.max_chars
+        multi_page = len(self.pages) > 1
+        for index in sorted(self.pages):
+            if remaining <= 0:
+                break
+            text = self.pages[index][:remaining]
+            remaining -= len(text)
+            parts.append(f"--- Page {index + 1} ---\n{text}" if multi_page else text)
+        return "\n\n".join(parts) + "\n\n" + (notes or '')
+
+
+def extract_report_text(files, notes=''):
+    """OCR every page of the uploads and build the text for the Groq prompt"""
+    builder = ReportTextBuilder()
+    pages = iter_pages(files, max_pages=getattr(settings, 'OCR_MAX_PAGES', 20))
+    for index, text, _ in ocr_pool.stream(pages):
+        builder.add(index, text)
+    return builder.build(notes)
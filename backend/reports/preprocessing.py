@@ -0,0 +1,101 @@
+"""
+Low-copy image decoding and tensor preprocessing for report uploads
+"""
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+import torch
+from PIL import Image
+
+TARGET_SIZE = (224, 224)
+# Modes Image.reduce() accepts; others (P, 1, I;16, LA, ...) are converted to L first
+REDUCIBLE_MODES = ('L', 'RGB', 'RGBA', 'I', 'F')
+
+
+def decode_grayscale(source, size=TARGET_SIZE):
+    """
+    Decode an upload (path, file object or PIL image) straight to an 8-bit
+    grayscale image of ``size``.
+
+    JPEGs are decoded with ``draft`` so libjpeg scales the DCT and converts to
+    luma while decoding; other formats are reduced by an integer factor before
+    the final resample. Full-resolution colour buffers are never materialised
+    for JPEG input.
+    """
+    image = source if isinstance(source, Image.Image) else Image.open(source)
+
+    if image.format == 'JPEG':
+        image.draft('L', size)
+    else:
+        factor = min(image.size[0] // size[0], image.size[1] // size[1])
+        if factor >= 2:
+            if image.mode not in REDUCIBLE_MODES:
+                image = image.convert('L')
+            image = image.reduce(factor)
+
+    if image.mode != 'L':
+        image = image.convert('L')
+    if image.size != size:
+        image = image.resize(size)
+    return image
+
+
+def fill_tensor(image, out):
+    """Write a grayscale image into a preallocated (1, H, W) float tensor in [0, 1]"""
+    pixels = torch.from_numpy(np.asarray(image, dtype=np.uint8))
+    out[0].copy_(pixels).div_(255.0)
+    return out
+
+
+def image_to_tensor(source, size=TARGET_SIZE):
+    """Single (1, H, W) tensor, equivalent to ToTensor() on the legacy path"""
+    out = torch.empty(1, size[1], size[0], dtype=torch.float32)
+    return fill_tensor(decode_grayscale(source, size), out)
+
+
+class InputBufferPool:
+    """
+    Reusable (N, 1, H, W) float32 input buffers, so each batched request
+    writes pixels into memory that is already allocated.
+    """
+
+    def __init__(self, size=TARGET_SIZE, capacity=16, max_buffers=8):
+        self.size = size
+        self.capacity = capacity
+        self.max_buffers = max_buffers
+        self._free = []
+        self._lock = threading.Lock()
+
+    def _allocate(self, n):
+        return torch.empty(max(n, self.capacity), 1, self.size[1], self.size[0], dtype=torch.float32)
+
+    @contextmanager
+    def batch(self, n):
+        """Borrow a buffer view of ``n`` images; it returns to the pool on exit"""
+        buffer = None
+        with self._lock:
+            for i, candidate in enumerate(self._free):
+                if candidate.shape[0] >= n:
+                    buffer = self._free.pop(i)
+                    break
+        if buffer is None:
+            buffer = self._allocate(n)
+        try:
+            yield buffer[:n]
+        finally:
+            with self._lock:
+                if len(self._free) < self.max_buffers:
+                    self._free.append(buffer)
+
+
+input_buffers = InputBufferPool()
+
+
+@contextmanager
+def preprocess_batch(sources, pool=input_buffers):
+    """Decode every source into one pooled (N, 1, H, W) batch tensor"""
+    with pool.batch(len(sources)) as batch:
+        for i, source in enumerate(sources):
+            fill_tensor(decode_grayscale(source, pool.size), batch[i])
+        yield batch
@@ -0,0 +1,217 @@
+"""
+Export and evaluation helpers for CPU-optimised builds of the unified MedMNIST model
+"""
+import logging
+import os
+import time
+
+import torch
+import torch.nn as nn
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+INPUT_SIZE = (224, 224)
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff')
+
+
+def get_quantized_engine():
+    """Pick the int8 kernel backend available on this CPU"""
+    engines = torch.backends.quantized.supported_engines
+    for engine in ('x86', 'fbgemm', 'qnnpack'):
+        if engine in engines:
+            return engine
+    raise RuntimeError("No quantized engine available in this torch build")
+
+
+def image_to_tensor(image):
+    """Same preprocessing as the reports view: grayscale, 224x224, [0, 1]"""
+    from .preprocessing import image_to_tensor as preprocess
+
+    return preprocess(image, INPUT_SIZE)
+
+
+def load_fp32_model(state_dict_path, num_classes):
+    """Eager fp32 model, identical to the one served by default"""
+    from .model_registry import create_unified_resnet18
+
+    model = create_unified_resnet18(num_classes=num_classes)
+    model.load_state_dict(torch.load(state_dict_path, map_location='cpu'))
+    return model.eval()
+
+
+def load_quantizable_model(state_dict_path, num_classes):
+    """
+    Quantization-ready ResNet18 (quant/dequant stubs, fusable blocks) carrying
+    the same fp32 weights. Parameter names match the plain torchvision model.
+    """
+    from torchvision.models import quantization as qmodels
+
+    model = qmodels.resnet18(weights=None, quantize=False)
+    model.conv1 = nn.Conv2d(1, 64, kernel_size=7, stride=2, padding=3, bias=False)
+    model.fc = nn.Linear(model.fc.in_features, num_classes)
+    model.load_state_dict(torch.load(state_dict_path, map_location='cpu'))
+    return model.eval()
+
+
+def quantize_static(model, calibration_tensors):
+    """Post-training static int8 quantization of convolutions and the classifier"""
+    from torch.ao import quantization as tq
+
+    engine = get_quantized_engine()
+    torch.backends.quantized.engine = engine
+
+    model.eval()
+    model.fuse_model()
+    model.qconfig = tq.get_default_qconfig(engine)
+    tq.prepare(model, inplace=True)
+    with torch.no_grad():
+        for batch in calibration_tensors:
+            model(batch)
+    tq.convert(model, inplace=True)
+    return model
+
+
+def quantize_dynamic(model):
+    """Dynamic int8 quantization; only the Linear classifier is quantized"""
+    from torch.ao import quantization as tq
+
+    torch.backends.quantized.engine = get_quantized_engine()
+    return tq.quantize_dynamic(model.eval(), {nn.Linear}, dtype=torch.qint8)
+
+
+def export_torchscript(model, path):
+    example = torch.zeros(1, 1, *INPUT_SIZE)
+    with torch.no_grad():
+        scripted = torch.jit.trace(model, example)
+    scripted = torch.jit.freeze(scripted.eval())
+    scripted.save(path)
+    return path
+
+
+def export_onnx(model, path, quantize=True):
+    """
+    Export the fp32 model to ONNX with a dynamic batch axis. When onnxruntime
+    is installed the graph is then int8-quantized in place.
+    """
+    example = torch.zeros(1, 1, *INPUT_SIZE)
+    fp32_path = path + '.fp32' if quantize else path
+    torch.onnx.export(
+        model, example, fp32_path,
+        input_names=['input'], output_names=['logits'],
+        dynamic_axes={'input': {0: 'batch'}, 'logits': {0: 'batch'}},
+        opset_version=17,
+    )
+    if not quantize:
+        return path
+    try:
+        from onnxruntime.quantization import QuantType, quantize_dynamic as ort_quantize_dynamic
+    except ImportError:
+        logger.warning("onnxruntime not installed, keeping fp32 ONNX export")
+        os.replace(fp32_path, path)
+        return path
+    ort_quantize_dynamic(fp32_path, path, weight_type=QuantType.QInt8)
+    os.remove(fp32_path)
+    return path
+
+
+class OnnxModel:
+    """Callable wrapper so an ONNX session can stand in for the torch model"""
+
+    def __init__(self, path):
+        import onnxruntime as ort
+
+        self.session = ort.InferenceSession(path, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, batch):
+        logits = self.session.run(None, {self.input_name: batch.detach().cpu().numpy()})[0]
+        return torch.from_numpy(logits)
+
+    def eval(self):
+        return self
+
+
+def iter_image_dir(directory, labels=None):
+    """
+    Yield (tensor, label_index) for images in a held-out directory. Images in
+    a sub-directory named after a class index or label are treated as labelled.
+    """
+    for root, _, files in os.walk(directory):
+        folder = os.path.basename(root) if root != directory else None
+        label_index = None
+        if folder is not None:
+            if folder.isdigit():
+                label_index = int(folder)
+            elif labels and folder in labels:
+                label_index = labels.index(folder)
+        for name in sorted(files):
+            if not name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            with Image.open(os.path.join(root, name)) as image:
+                yield image_to_tensor(image), label_index
+
+
+def batched(tensors, batch_size=32):
+    batch = []
+    for tensor in tensors:
+        batch.append(tensor)
+        if len(batch) == batch_size:
+            yield torch.stack(batch)
+            batch = []
+    if batch:
+        yield torch.stack(batch)
+
+
+def _timed_predict(model, tensor):
+    start = time.perf_counter()
+    with torch.no_grad():
+        probs = torch.softmax(model(tensor.unsqueeze(0)), dim=1)[0]
+    return probs, (time.perf_counter() - start) * 1000
+
+
+def compare_models(reference, candidate, samples):
+    """
+    Accuracy delta between the fp32 reference and an exported candidate on a
+    held-out set, with single-image latency for both.
+    """
+    total = labelled = agree = 0
+    correct_ref = correct_cand = 0
+    prob_delta = 0.0
+    ref_ms = cand_ms = 0.0
+
+    for tensor, label_index in samples:
+        ref_probs, ref_time = _timed_predict(reference, tensor)
+        cand_probs, cand_time = _timed_predict(candidate, tensor)
+        ref_class = int(torch.argmax(ref_probs))
+        cand_class = int(torch.argmax(cand_probs))
+
+        total += 1
+        agree += ref_class == cand_class
+        prob_delta += float(torch.max(torch.abs(ref_probs - cand_probs)))
+        ref_ms += ref_time
+        cand_ms += cand_time
+        if label_index is not None:
+            labelled += 1
+            correct_ref += ref_class == label_index
+            correct_cand += cand_class == label_index
+
+    if not total:
+        return None
+
+    report = {
+        'images': total,
+        'top1_agreement': round(agree / total * 100, 2),
+        'mean_max_prob_delta': round(prob_delta / total, 4),
+        'reference_ms_per_image': round(ref_ms / total, 2),
+        'candidate_ms_per_image': round(cand_ms / total, 2),
+        'speedup': round(ref_ms / cand_ms, 2) if cand_ms else None,
+    }
+    if labelled:
+        report.update({
+            'labelled_images': labelled,
+            'reference_accuracy': round(correct_ref / labelled * 100, 2),
+            'candidate_accuracy': round(correct_cand / labelled * 100, 2),
+            'accuracy_delta': round((correct_cand - correct_ref) / labelled * 100, 2),
+        })
+    return report
@@ -0,0 +1,39 @@
+"""
+Content-addressed cache of report analysis results
+"""
+import hashlib
+
+from django.conf import settings
+
+from backend.cache import TieredCache
+
+# Bump when prompts or result post-processing change so stale entries are ignored
+ANALYSIS_VERSION = '1'
+
+result_cache = TieredCache(
+    'report-analysis',
+    max_size=getattr(settings, 'REPORT_CACHE_SIZE', 512),
+    ttl=getattr(settings, 'REPORT_CACHE_TTL', 86400),
+)
+
+
+def content_key(files, report_type, notes, model_version):
+    """
+    SHA-256 over every uploaded file's bytes plus the inputs that shape the
+    analysis. Upload streams are rewound afterwards so they can still be decoded.
+    """
+    digest = hashlib.sha256()
+    for key in (ANALYSIS_VERSION, model_version, report_type, (notes or '').strip()):
+        digest.update(key.encode('utf-8'))
+        digest.update(b'\0')
+    for file in files:
+        file.seek(0)
+        for chunk in file.chunks() if hasattr(file, 'chunks') else iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+        digest.update(b'\0')
+        file.seek(0)
+    return digest.hexdigest()
+
+
+def is_enabled():
+    return getattr(settings, 'REPORT_CACHE_ENABLED', True)
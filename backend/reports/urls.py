@@ -6,4 +6,7 @@ from . import views
 
 urlpatterns = [
     path('analyze/', views.analyze_report, name='analyze_report'),
+    path('metrics/', views.reports_metrics, name='reports_metrics'),
+    path('jobs/<str:report_id>/', views.report_job_status, name='report_job_status'),
+    path('jobs/<str:report_id>/events/', views.report_job_events, name='report_job_events'),
 ]
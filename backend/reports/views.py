@@ -1,61 +1,42 @@
-import os
 import io
-import json
-import re
 import logging
-import numpy as np
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from PIL import Image
-import torch
-import torch.nn.functional as F
-from torchvision import transforms, models
-import torch.nn as nn
 
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework import status
 from django.views.decorators.csrf import csrf_exempt
+from django.conf import settings
 
-from accounts.models import UserProfile
+from backend import json_stream, llm_client, sse
 from .models import MedicalReport
+from .model_registry import registry
+from . import label_table, result_cache
+from .jobs import JobQueueFull, TERMINAL_STATUSES, expire_if_stale, job_runner
+from .ocr import extract_report_text, ocr_pool
 
 logger = logging.getLogger(__name__)
 
-# Load class labels from saved file generated during training
-def load_class_labels(path):
-    with open(path, "r") as f:
-        return [line.strip().split(',', 1)[1] for line in f.readlines()]
-
-CLASS_LABELS = load_class_labels(r'D:\\AAA_Medical_AI\\medical-ai-platform\\backend\\models\\medmnist_global_labels.txt')
-NUM_CLASSES = len(CLASS_LABELS)
-
-# Path to your unified PyTorch model
-UNIFIED_MODEL_PATH = r'D:\\AAA_Medical_AI\\medical-ai-platform\\backend\\models\\medmnist_unified_model.pth'
-
-# Create the unified ResNet18 model architecture
-def create_unified_resnet18(in_channels=1, num_classes=NUM_CLASSES):
-    model = models.resnet18(weights=None)
-    model.conv1 = nn.Conv2d(in_channels, 64, kernel_size=7, stride=2, padding=3, bias=False)
-    model.fc = nn.Linear(model.fc.in_features, num_classes)
-    return model
-
-# Load the trained model
-unified_model = create_unified_resnet18()
-unified_model.load_state_dict(torch.load(UNIFIED_MODEL_PATH, map_location='cpu'))
-unified_model.eval()
-
-def get_user_from_token(request):
-    auth_header = request.META.get('HTTP_AUTHORIZATION', '')
-    if auth_header.startswith('Bearer '):
-        try:
-            import jwt
-            token = auth_header.split(' ')[1]
-            decoded = jwt.decode(token, options={"verify_signature": False})
-            user_id = decoded.get('user_id')
-            return UserProfile.objects(id=user_id).first()
-        except Exception as e:
-            logger.error(f"Token decode error: {e}")
-    return None
+IMAGE_REPORT_TYPES = [
+    'xray', 'ct', 'ctscan', 'mri', 'ultrasound', 'ecg', 'ekg', 'brain',
+    'organ', 'chest', 'mammogram', 'breast'
+]
+TEXT_REPORT_TYPES = [
+    'blood', 'lab', 'labreport', 'bloodreport', 'prescription', 'pathology'
+]
+TEXT_MODEL = "llama3-8b-8192"
+FALLBACK_DESCRIPTION = "Fallback default analysis"
+DEFAULT_URGENCY = "medium"
+DEFAULT_INTERPRETATION = "-"
+# Whether the Groq urgency/interpretation calls for an image finding answered
+ENRICHMENT_COMPLETE = "complete"
+ENRICHMENT_PARTIAL = "partial"
+ENRICHMENT_UNAVAILABLE = "unavailable"
 
 def human_label(raw_label):
     # Simplify labels for better user understanding
@@ -64,37 +45,47 @@ def human_label(raw_label):
         return parts[1].replace("_", " ").capitalize()
     return raw_label.replace("_", " ").capitalize()
 
-def get_urgency_from_groq(disease_label):
-    try:
-        import requests
-        from django.conf import settings
-
-        prompt = f"Given the medical finding '{disease_label}', what is the recommended patient urgency: low, medium, or high? Reply strictly with one of these words."
+def get_urgency_from_groq(disease_label, deadline=None):
+    urgency = fetch_urgency_from_groq(disease_label, deadline=deadline)
+    return urgency or DEFAULT_URGENCY  # default fallback
 
-        data = {
-            "model": "llama3-8b-8192",
-            "messages": [{"role": "system", "content": "Medical AI"}, {"role": "user", "content": prompt}],
-            "temperature": 0.0,
-            "max_tokens": 10
-        }
-        headers = {
-            'Authorization': f'Bearer {settings.GROQ_API_KEY}',
-            'Content-Type': 'application/json'
-        }
-
-        res = requests.post("https://api.groq.com/openai/v1/chat/completions", headers=headers, json=data, timeout=15)
-        if res.status_code == 200:
-            urgency = res.json()['choices'][0]['message']['content'].strip().lower()
-            if urgency in ["low", "medium", "high"]:
-                return urgency
-    except Exception as e:
+def fetch_urgency_from_groq(disease_label, deadline=None):
+    """Ask Groq for the urgency of a finding; None if the call fails or the reply is invalid"""
+    prompt = f"Given the medical finding '{disease_label}', what is the recommended patient urgency: low, medium, or high? Reply strictly with one of these words."
+    try:
+        content = llm_client.chat(
+            [{"role": "system", "content": "Medical AI"}, {"role": "user", "content": prompt}],
+            model=TEXT_MODEL, temperature=0.0, max_tokens=10, timeout=15, deadline=deadline
+        )
+        urgency = content.strip().lower()
+        if urgency in ["low", "medium", "high"]:
+            return urgency
+    except llm_client.LLMError as e:
         logger.error(f"Groq API urgency error: {e}")
-    return "medium"  # default fallback
-
-def get_interpreted_finding(pred_class_label, report_type, user_description):
-    import requests
-    from django.conf import settings
+    return None
 
+def default_recommendations(is_normal):
+    return ["Consult specialist if abnormal" if not is_normal else "Routine follow-up"]
+
+def describe_label(raw_label):
+    """
+    Display label, urgency and recommendations for a class label from the
+    precomputed label table. Urgency is None when the table has no answer
+    or REPORT_URGENCY_SOURCE=llm, meaning it must come from Groq.
+    """
+    entry = label_table.lookup(raw_label)
+    if entry is None:
+        pretty_label = human_label(raw_label)
+        return pretty_label, None, default_recommendations(pretty_label.lower() == "normal")
+    urgency = None if label_table.use_llm_override() else entry['urgency']
+    return entry['human_label'], urgency, entry.get('recommendations') or default_recommendations(entry['human_label'].lower() == "normal")
+
+def get_interpreted_finding(pred_class_label, report_type, user_description, deadline=None):
+    summary = fetch_interpreted_finding(pred_class_label, report_type, user_description, deadline=deadline)
+    return summary or DEFAULT_INTERPRETATION
+
+def fetch_interpreted_finding(pred_class_label, report_type, user_description, deadline=None):
+    """Ask Groq to interpret a finding; None if the call fails"""
     prompt = f"""
 You are an expert medical assistant.
 Given a user description: "{user_description}" and an AI model prediction: "{pred_class_label}" for a {report_type} report (e.g., chest X-ray),
@@ -103,33 +94,76 @@ Given a user description: "{user_description}" and an AI model prediction: "{pre
 3. Return ONLY the disease/finding name (e.g., 'Pneumonia', 'Tuberculosis', 'Normal Chest'), a dash (–) if unknown, or the most relevant clinical conclusion.
 Do NOT add disclaimers or extra sentences.
 """
-    data = {
-        "model": "llama3-8b-8192",
-        "messages": [{"role": "system", "content": "Medical AI assistant"}, {"role": "user", "content": prompt}],
-        "temperature": 0.3,
-        "max_tokens": 30
-    }
-    GROQ_API_KEY = os.environ.get("GROQ_API_KEY")
-    print("Groq API Key:", GROQ_API_KEY)  # Remove after confirming
-    headers = {
-        'Authorization': f'Bearer {GROQ_API_KEY}',
-        'Content-Type': 'application/json'
-    }
+    try:
+        content = llm_client.chat(
+            [{"role": "system", "content": "Medical AI assistant"}, {"role": "user", "content": prompt}],
+            model=TEXT_MODEL, temperature=0.3, max_tokens=30, timeout=15, deadline=deadline
+        )
+        return content.strip() or None
+    except llm_client.LLMError as e:
+        logger.error(f"Groq API interpretation error: {e}")
+    return None
 
-    response = requests.post("https://api.groq.com/openai/v1/chat/completions", headers=headers, json=data, timeout=15)
-    if response.status_code == 200:
-        finding = response.json()['choices'][0]['message']['content'].strip()
-        return finding
-    return "-"
+_enrichment_pool = None
+_enrichment_pool_lock = threading.Lock()
+
+def get_enrichment_pool():
+    global _enrichment_pool
+    with _enrichment_pool_lock:
+        if _enrichment_pool is None:
+            _enrichment_pool = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'REPORT_LLM_MAX_WORKERS', 8),
+                thread_name_prefix='report-llm'
+            )
+        return _enrichment_pool
+
+def enrich_finding(pretty_label, report_type, user_description, urgency=None):
+    """
+    Fetch urgency (unless already known from the label table) and the
+    interpreted finding concurrently under one shared deadline. Whichever
+    call misses the deadline or fails comes back as None; the other result
+    is kept. Returns (urgency, summary, enrichment) where enrichment is
+    'complete', 'partial' or 'unavailable'.
+    """
+    deadline = getattr(settings, 'REPORT_LLM_DEADLINE_SECONDS', 15)
+    call_deadline = time.monotonic() + deadline
+    pool = get_enrichment_pool()
+    futures = {'interpretation': pool.submit(
+        fetch_interpreted_finding, pretty_label, report_type, user_description, call_deadline
+    )}
+    if urgency is None:
+        futures['urgency'] = pool.submit(fetch_urgency_from_groq, pretty_label, call_deadline)
+    wait(list(futures.values()), timeout=deadline)
+    results = {name: result_or_none(future, name, deadline) for name, future in futures.items()}
+
+    missing = sum(1 for result in results.values() if result is None)
+    if missing == 0:
+        enrichment = ENRICHMENT_COMPLETE
+    elif missing < len(results):
+        enrichment = ENRICHMENT_PARTIAL
+    else:
+        enrichment = ENRICHMENT_UNAVAILABLE
+    if urgency is None:
+        urgency = results['urgency'] or DEFAULT_URGENCY
+    return urgency, results['interpretation'], enrichment
+
+def result_or_none(future, name, deadline):
+    if not future.done():
+        future.cancel()
+        logger.warning(f"Groq {name} call missed the {deadline}s deadline")
+        return None
+    try:
+        return future.result()
+    except Exception as e:
+        logger.error(f"Groq {name} error: {e}")
+        return None
 
 
 @csrf_exempt
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def analyze_report(request):
-    user = get_user_from_token(request)
-    if not user:
-        return Response({'error': 'Authentication required'}, status=status.HTTP_401_UNAUTHORIZED)
+    user = request.user
 
     report_type = request.data.get('report_type', '').lower()
     additional_notes = request.data.get('additional_notes', '')
@@ -141,8 +175,11 @@ def analyze_report(request):
     if not report_type:
         return Response({'error': 'Report type is required'}, status=status.HTTP_400_BAD_REQUEST)
 
+    if is_async_request(request):
+        return submit_report_job(user, report_type, uploaded_files, additional_notes)
+
     try:
-        analysis_result = analyze_by_type(report_type, uploaded_files, additional_notes)
+        analysis_result, cache_hit = analyze_with_cache(report_type, uploaded_files, additional_notes)
 
         report = MedicalReport(
             user=user,
@@ -160,80 +197,267 @@ def analyze_report(request):
         return Response({
             **analysis_result,
             'reportId': str(report.id),
-            'savedToHistory': True
+            'savedToHistory': True,
+            'cached': cache_hit
         }, status=status.HTTP_201_CREATED)
 
     except Exception as e:
         logger.error(f"Report analysis error: {e}")
         return Response({'error': 'Internal Server Error'}, status=500)
 
+def is_async_request(request):
+    value = request.query_params.get('async', request.data.get('async', ''))
+    return str(value).lower() in ('1', 'true', 'yes')
+
+def submit_report_job(user, report_type, uploaded_files, additional_notes):
+    """Persist a pending report, queue it on the local worker pool and return 202"""
+    report = MedicalReport(
+        user=user,
+        report_type=report_type,
+        file_names=[file.name for file in uploaded_files],
+        additional_notes=additional_notes,
+        status='pending'
+    )
+    report.save()
+    try:
+        job_id = job_runner.submit(report, uploaded_files, report_type, additional_notes)
+    except JobQueueFull:
+        report.delete()
+        response = Response({'error': 'Analysis queue is full, please retry shortly'},
+                            status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        response['Retry-After'] = '5'
+        return response
+    except Exception as e:
+        logger.error(f"Report job submission error: {e}")
+        report.delete()
+        return Response({'error': 'Internal Server Error'}, status=500)
+
+    return Response({
+        'jobId': job_id,
+        'reportId': job_id,
+        'status': 'pending',
+        'statusUrl': f'/api/reports/jobs/{job_id}/',
+        'eventsUrl': f'/api/reports/jobs/{job_id}/events/'
+    }, status=status.HTTP_202_ACCEPTED)
+
+def job_payload(report):
+    """Status document for an async job, including the result once completed"""
+    payload = {
+        'jobId': str(report.id),
+        'status': report.status,
+    }
+    if report.status == 'completed':
+        payload['result'] = {
+            'reportType': report.report_type.title(),
+            'findings': report.findings,
+            'recommendations': report.recommendations,
+            'urgency': report.urgency,
+            'summary': report.summary,
+            'confidence': report.confidence_score,
+            'reportId': str(report.id),
+            'savedToHistory': True
+        }
+    elif report.status == 'failed':
+        payload['error'] = report.error or 'Analysis failed'
+    return payload
+
+def get_user_report(user, report_id):
+    try:
+        return MedicalReport.objects(id=report_id, user=user).first()
+    except Exception:
+        return None
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def report_job_status(request, report_id):
+    """Poll an async analysis job"""
+    user = request.user
+    report = get_user_report(user, report_id)
+    if not report:
+        return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+    if expire_if_stale(report):
+        report.reload()
+    return Response(job_payload(report))
+
+def job_events(report_id):
+    """
+    Server-sent events for a job: a heartbeat while it runs and one final
+    event when it completes or fails. Jobs running in this process wake the
+    stream immediately; others are polled.
+
+    Each open stream holds a server worker, so on sync workers the stream is
+    capped at REPORT_JOB_SSE_TIMEOUT; the closing ``timeout`` event carries
+    the status URL for the client to poll (or reconnect) instead.
+    """
+    poll_interval = getattr(settings, 'REPORT_JOB_SSE_POLL_SECONDS', 1.0)
+    deadline = time.monotonic() + getattr(settings, 'REPORT_JOB_SSE_TIMEOUT', 25)
+    while True:
+        report = MedicalReport.objects(id=report_id).only('status', 'error', 'created_at').first()
+        if report is None:
+            yield sse.event('error', {'error': 'Job not found'})
+            return
+        if report.status in TERMINAL_STATUSES or expire_if_stale(report):
+            report.reload()
+            yield sse.event(report.status, job_payload(report))
+            return
+        if time.monotonic() >= deadline:
+            yield sse.event('timeout', {
+                'jobId': report_id,
+                'status': report.status,
+                'statusUrl': f'/api/reports/jobs/{report_id}/',
+            })
+            return
+        yield sse.event('status', {'jobId': report_id, 'status': report.status})
+        if not job_runner.wait(report_id, poll_interval):
+            time.sleep(poll_interval)
+
+@api_view(['GET'])
+@renderer_classes([JSONRenderer, sse.EventStreamRenderer])
+@permission_classes([IsAuthenticated])
+def report_job_events(request, report_id):
+    """Stream async job completion as server-sent events"""
+    user = request.user
+    if not get_user_report(user, report_id):
+        return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+    return sse.event_stream_response(job_events(report_id))
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def reports_metrics(request):
+    """Inference engine batching, result cache, async job, OCR and parsing statistics"""
+    return Response({
+        'inference': registry.get_engine().stats() if registry.engine_started else None,
+        'result_cache': result_cache.result_cache.stats(),
+        'jobs': job_runner.stats(),
+        'ocr': ocr_pool.stats(),
+        'llm': llm_client.get_client().stats(),
+        'parsing': json_stream.parse_stats.stats('reports'),
+    })
+
+def analyze_with_cache(report_type, files, notes):
+    """
+    Serve analyze_by_type results from the content-hash cache when the same
+    uploads were analyzed before with the same report type, notes and model.
+    Returns (result, cache_hit).
+    """
+    if not result_cache.is_enabled():
+        return analyze_by_type(report_type, files, notes), False
+
+    if report_type in IMAGE_REPORT_TYPES:
+        model_version = f"{registry.get_model_version()}+labels-{label_table.table_version()}"
+    else:
+        model_version = TEXT_MODEL
+    key = result_cache.content_key(files, report_type, notes, model_version)
+    cached = result_cache.result_cache.get(key)
+    if cached is not None:
+        # Per-file findings carry the original uploader's file names
+        file_names = iter(getattr(file, 'name', None) for file in files)
+        findings = [
+            {**finding, 'file': next(file_names, None)} if 'file' in finding else finding
+            for finding in cached.get('findings', [])
+        ]
+        return {**cached, 'findings': findings}, True
+
+    result = analyze_by_type(report_type, files, notes)
+    # Degraded results stand in for a failed Groq call and must not be replayed
+    if not is_degraded(result):
+        result_cache.result_cache.set(key, result)
+    return result, False
+
+def is_degraded(result):
+    """True for fallback analyses and findings whose Groq enrichment fell back to defaults"""
+    return any(
+        finding.get('description') == FALLBACK_DESCRIPTION
+        or finding.get('enrichment', ENRICHMENT_COMPLETE) != ENRICHMENT_COMPLETE
+        for finding in result.get('findings', [])
+    )
+
 def analyze_by_type(report_type, files, notes):
-    image = Image.open(files[0]).convert('RGB')
-    image_types = [
-        'xray', 'ct', 'ctscan', 'mri', 'ultrasound', 'ecg', 'ekg', 'brain',
-        'organ', 'chest', 'mammogram', 'breast'
-    ]
-    text_types = [
-        'blood', 'lab', 'labreport', 'bloodreport', 'prescription', 'pathology'
-    ]
-    if report_type in image_types:
-        return analyze_image_report(image, report_type, notes)
-    elif report_type in text_types:
-        return analyze_text_report(image, report_type, notes)
+    if report_type in IMAGE_REPORT_TYPES:
+        file_names = [getattr(file, 'name', None) for file in files]
+        return analyze_image_report(files, report_type, notes, file_names=file_names)
+    elif report_type in TEXT_REPORT_TYPES:
+        return analyze_text_report(files, report_type, notes)
     else:
         return generate_fallback_analysis(report_type, files, notes)
 
-def analyze_image_report(image, report_type, user_description):
-    # Convert to grayscale, resize to 224x224, tensor, batch dim
-    img = image.convert("L").resize((224, 224))
-    img_tensor = transforms.ToTensor()(img).unsqueeze(0)
-
-    with torch.no_grad():
-        output = unified_model(img_tensor)
-        probs = F.softmax(output, dim=1)
-        pred_class = int(torch.argmax(probs, dim=1).item())
-        confidence = float(torch.max(probs)) * 100
-        raw_label = CLASS_LABELS[pred_class]
-
-    pretty_label = human_label(raw_label)
+def analyze_image_report(images, report_type, user_description, file_names=None):
+    """
+    Classify one or more images (uploads or PIL images) of a study in a single
+    batched forward pass. Each image gets its own finding; multi-image studies
+    also get an aggregate finding computed from the mean class probabilities.
+    """
+    import torch
+    from .preprocessing import preprocess_batch
+
+    if isinstance(images, Image.Image):
+        images = [images]
+    file_names = file_names or [None] * len(images)
+
+    # Decode straight to 224x224 grayscale into a pooled batch buffer
+    with preprocess_batch(images) as batch:
+        results = registry.get_engine().predict_batch(batch)
+    labels = registry.get_labels()
+
+    mean_probs = torch.stack([result['probabilities'] for result in results]).mean(dim=0)
+    confidence = float(torch.max(mean_probs)) * 100
+    pretty_label, urgency, recommendations = describe_label(labels[int(torch.argmax(mean_probs))])
     is_normal = pretty_label.lower() == "normal"
-    urgency = get_urgency_from_groq(pretty_label)
-    summary = get_interpreted_finding(pretty_label, report_type, user_description)
-
-    return {
-        "reportType": report_type.title(),
-        "findings": [{
-            "category": "Image Analysis",
+    urgency, summary, enrichment = enrich_finding(pretty_label, report_type, user_description, urgency=urgency)
+    if summary is None:
+        # Say what the model found rather than passing off a placeholder as the interpretation
+        summary = f"{pretty_label} ({confidence:.1f}% model confidence). Detailed interpretation is currently unavailable."
+
+    findings = []
+    if len(results) > 1:
+        findings.append({
+            "category": "Overall Image Analysis",
             "finding": pretty_label,
             "severity": "abnormal" if not is_normal else "normal",
-            "description": summary
-        }],
-        "recommendations": [
-            "Consult specialist if abnormal" if not is_normal else "Routine follow-up"
-        ],
+            "description": summary,
+            "images": len(results),
+            "enrichment": enrichment
+        })
+    for index, (result, file_name) in enumerate(zip(results, file_names)):
+        file_label = describe_label(labels[result['class_index']])[0]
+        file_normal = file_label.lower() == "normal"
+        findings.append({
+            "category": "Image Analysis",
+            "finding": file_label,
+            "severity": "abnormal" if not file_normal else "normal",
+            "description": summary if len(results) == 1 else f"Image {index + 1}: {file_label} ({result['confidence']:.1f}% confidence)",
+            "file": file_name,
+            "confidence": result['confidence']
+        })
+        if len(results) == 1:
+            findings[-1]["enrichment"] = enrichment
+
+    if is_normal and any(finding["severity"] == "abnormal" for finding in findings):
+        recommendations = default_recommendations(False)
+    return {
+        "reportType": report_type.title(),
+        "findings": findings,
+        "recommendations": recommendations,
         "urgency": urgency,
         "summary": summary,
         "confidence": confidence
     }
 
-def analyze_text_report(image, report_type, notes):
+def analyze_text_report(files, report_type, notes):
+    """OCR every page of every upload in parallel and analyze the combined text"""
+    if llm_client.get_client().breaker.state == 'open':
+        # Groq is failing; don't spend OCR time on text nobody will analyze
+        return generate_fallback_analysis(report_type, [], notes)
     try:
-        import pytesseract
-        text = pytesseract.image_to_string(image)
-        return call_groq_api(report_type, text + "\n\n" + notes)
+        if isinstance(files, Image.Image):
+            files = [files]
+        content = extract_report_text(files, notes)
+        return call_groq_api(report_type, content)
     except Exception as e:
         logger.error(f"OCR or AI error: {e}")
         return generate_fallback_analysis(report_type, [], notes)
 
 def call_groq_api(report_type, content):
-    import requests
-    from django.conf import settings
-
-    headers = {
-        'Authorization': f'Bearer {settings.GROQ_API_KEY}',
-        'Content-Type': 'application/json'
-    }
-
     prompt = f"""
 You are a medical AI analyzing a {report_type} report. Analyze this text:
 
@@ -250,23 +474,24 @@ Return analysis in JSON:
 }}
 """
 
-    data = {
-        "model": "llama3-8b-8192",
-        "messages": [{"role": "system", "content": "Medical AI"}, {"role": "user", "content": prompt}],
-        "temperature": 0.2,
-        "max_tokens": 1500
-    }
-
-    res = requests.post("https://api.groq.com/openai/v1/chat/completions", headers=headers, json=data, timeout=30)
-    if res.status_code == 200:
-        try:
-            response_data = res.json()['choices'][0]['message']['content']
-            json_str = re.sub(r'^```$', '', response_data.strip(), flags=re.MULTILINE)
-            return json.loads(json_str)
-        except Exception as e:
-            logger.error(f"Groq parsing error: {e}")
+    response_data = llm_client.chat(
+        [{"role": "system", "content": "Medical AI"}, {"role": "user", "content": prompt}],
+        model=TEXT_MODEL, temperature=0.2, max_tokens=1500, timeout=30
+    )
+    try:
+        return json_stream.extract_json(response_data, validate_report_result, name='reports')
+    except json_stream.JSONExtractionError as e:
+        logger.error(f"Groq parsing error: {e}")
     raise Exception("Groq API failed")
 
+def validate_report_result(result):
+    """Schema check for parsed text report analyses"""
+    json_stream.require(result, {'findings': list, 'recommendations': list, 'urgency': str, 'summary': str})
+    if result['urgency'] not in ('low', 'medium', 'high'):
+        raise ValueError(f"unknown urgency '{result['urgency']}'")
+    for finding in result['findings']:
+        json_stream.require(finding, {'finding': str})
+
 def generate_fallback_analysis(report_type, files, notes):
     return {
         "reportType": f"{report_type.title()} Report",
@@ -274,7 +499,7 @@ def generate_fallback_analysis(report_type, files, notes):
             "category": "General",
             "finding": "No specific abnormalities detected",
             "severity": "normal",
-            "description": "Fallback default analysis"
+            "description": FALLBACK_DESCRIPTION
         }],
         "recommendations": ["Consult doctor for detailed evaluation"],
         "urgency": "low",
@@ -11,7 +11,6 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 load_dotenv(BASE_DIR / '.env')
 
 GROQ_API_KEY = os.environ.get("GROQ_API_KEY", "")
-print("🔑 Loaded GROQ_API_KEY:", GROQ_API_KEY)
 
 
 # SECURITY WARNING: keep the secret key used in production secret!
@@ -139,6 +138,17 @@ SIMPLE_JWT = {
     'USER_ID_CLAIM': 'user_id',
 }
 
+# Authenticated users are cached per process for USER_CACHE_TTL seconds
+# (invalidated on profile save/delete in the same process)
+USER_CACHE_SIZE = config('USER_CACHE_SIZE', default=1024, cast=int)
+USER_CACHE_TTL = config('USER_CACHE_TTL', default=60, cast=int)
+
+# Login password checks run on a pool of LOGIN_HASH_WORKERS threads per
+# process; beyond LOGIN_HASH_MAX_PENDING queued checks login returns 503
+LOGIN_HASH_WORKERS = config('LOGIN_HASH_WORKERS', default=4, cast=int)
+LOGIN_HASH_MAX_PENDING = config('LOGIN_HASH_MAX_PENDING', default=32, cast=int)
+LOGIN_HASH_TIMEOUT = config('LOGIN_HASH_TIMEOUT', default=10, cast=float)
+
 
 
 
@@ -173,6 +183,127 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # AI Configuration
 
+# Shared Groq client (backend/llm_client.py): keep-alive pool size, max
+# in-flight requests per process, retries on 429/5xx, and a circuit breaker
+# that short-circuits to local fallbacks after consecutive failures
+GROQ_TIMEOUT = config('GROQ_TIMEOUT', default=30, cast=float)
+GROQ_POOL_SIZE = config('GROQ_POOL_SIZE', default=10, cast=int)
+GROQ_MAX_CONCURRENCY = config('GROQ_MAX_CONCURRENCY', default=8, cast=int)
+GROQ_MAX_RETRIES = config('GROQ_MAX_RETRIES', default=2, cast=int)
+GROQ_BREAKER_FAILURES = config('GROQ_BREAKER_FAILURES', default=5, cast=int)
+GROQ_BREAKER_RESET_SECONDS = config('GROQ_BREAKER_RESET_SECONDS', default=30, cast=float)
+
+# MedMNIST unified model artifacts, loaded lazily on first use. Set
+# MODEL_WARMUP to load them when the WSGI application starts instead.
+MEDMNIST_MODELS_DIR = config('MEDMNIST_MODELS_DIR', default=str(BASE_DIR / 'backend' / 'models'))
+MEDMNIST_MODEL_PATH = config('MEDMNIST_MODEL_PATH', default=os.path.join(MEDMNIST_MODELS_DIR, 'medmnist_unified_model.pth'))
+MEDMNIST_LABELS_PATH = config('MEDMNIST_LABELS_PATH', default=os.path.join(MEDMNIST_MODELS_DIR, 'medmnist_global_labels.txt'))
+# Serving backend: eager (fp32 state dict), torchscript or onnx. The latter two
+# load the int8 builds produced by `manage.py export_unified_model`.
+MEDMNIST_MODEL_BACKEND = config('MEDMNIST_MODEL_BACKEND', default='eager')
+MEDMNIST_EXPORTED_MODEL_PATH = config('MEDMNIST_EXPORTED_MODEL_PATH', default='')
+MEDMNIST_MODEL_VERSION = config('MEDMNIST_MODEL_VERSION', default='')
+MODEL_WARMUP = config('MODEL_WARMUP', default=False, cast=bool)
+
+# Per-report-type models in reports/ml_inference.py are kept in a per-process
+# LRU cache of this many entries
+REPORT_MODEL_CACHE_SIZE = config('REPORT_MODEL_CACHE_SIZE', default=4, cast=int)
+
+# Local symptom classifier written by scripts/ai-model-training.py (run it
+# from LOCAL_MODEL_DIR), loaded once per process. LOCAL_MODEL_MODE: off, primary (answer locally, Groq on
+# failure), fallback (Groq first, local instead of the mock), prefilter
+# (answer locally when the result is low urgency and at least
+# LOCAL_MODEL_PREFILTER_CONFIDENCE percent confident, otherwise Groq) or
+# hedge (Groq first, local raced alongside it, see below)
+LOCAL_MODEL_DIR = config('LOCAL_MODEL_DIR', default=MEDMNIST_MODELS_DIR)
+LOCAL_MODEL_PATH = config('LOCAL_MODEL_PATH', default=os.path.join(LOCAL_MODEL_DIR, 'medical_prediction_model.pkl'))
+LOCAL_VECTORIZER_PATH = config('LOCAL_VECTORIZER_PATH', default=os.path.join(LOCAL_MODEL_DIR, 'symptom_vectorizer.pkl'))
+LOCAL_DISEASE_MAPPING_PATH = config('LOCAL_DISEASE_MAPPING_PATH', default=os.path.join(LOCAL_MODEL_DIR, 'disease_mapping.json'))
+LOCAL_MODEL_MODE = config('LOCAL_MODEL_MODE', default='fallback')
+LOCAL_MODEL_PREFILTER_CONFIDENCE = config('LOCAL_MODEL_PREFILTER_CONFIDENCE', default=80, cast=float)
+
+# Deadline-aware prediction routing: Groq gets PREDICTION_LATENCY_BUDGET_SECONDS
+# per request before the fallback answers. Only with LOCAL_MODEL_MODE=hedge
+# is the local model started alongside it after PREDICTION_HEDGE_DELAY_SECONDS
+# (or as soon as Groq fails), the first valid answer winning; a Groq answer
+# that arrives after losing is still cached. Per-tier latency and win rates:
+# /api/predictions/metrics/
+PREDICTION_HEDGING_ENABLED = config('PREDICTION_HEDGING_ENABLED', default=True, cast=bool)
+PREDICTION_LATENCY_BUDGET_SECONDS = config('PREDICTION_LATENCY_BUDGET_SECONDS', default=10, cast=float)
+PREDICTION_HEDGE_DELAY_SECONDS = config('PREDICTION_HEDGE_DELAY_SECONDS', default=2.0, cast=float)
+PREDICTION_ROUTING_WORKERS = config('PREDICTION_ROUTING_WORKERS', default=16, cast=int)
+
+# Batch predictions (POST /api/predictions/bulk/): max items per request and
+# how many are evaluated at once per process
+PREDICTION_BULK_MAX_ITEMS = config('PREDICTION_BULK_MAX_ITEMS', default=50, cast=int)
+PREDICTION_BULK_CONCURRENCY = config('PREDICTION_BULK_CONCURRENCY', default=4, cast=int)
+
+# Keep per-user prediction totals in the user_stats collection, updated as
+# predictions are created, so /api/predictions/stats/ reads one document.
+# Existing history is folded in on first read; repair drift with
+# `manage.py rebuild_user_stats`
+PREDICTION_STATS_MATERIALIZED = config('PREDICTION_STATS_MATERIALIZED', default=False, cast=bool)
+
+# Report image inference: concurrent requests are micro-batched up to
+# MAX_BATCH_SIZE images, waiting at most MAX_WAIT_MS for a batch to fill
+REPORTS_INFERENCE_MAX_BATCH_SIZE = config('REPORTS_INFERENCE_MAX_BATCH_SIZE', default=16, cast=int)
+REPORTS_INFERENCE_MAX_WAIT_MS = config('REPORTS_INFERENCE_MAX_WAIT_MS', default=10, cast=float)
+
+# Redis (optional shared cache tier, see docker-compose.yml)
+REDIS_URL = config('REDIS_URL', default='')
+
+# Symptom prediction cache, keyed on the canonical symptom set, normalized
+# additional info and prompt/model version
+PREDICTION_CACHE_ENABLED = config('PREDICTION_CACHE_ENABLED', default=True, cast=bool)
+PREDICTION_CACHE_SIZE = config('PREDICTION_CACHE_SIZE', default=1024, cast=int)
+PREDICTION_CACHE_TTL = config('PREDICTION_CACHE_TTL', default=21600, cast=int)
+
+# Semantic prediction cache: serves near-duplicate symptom submissions whose
+# TF-IDF cosine similarity clears the threshold (in-memory, per process).
+# Off by default; tune the threshold with /api/predictions/metrics/
+SEMANTIC_CACHE_ENABLED = config('SEMANTIC_CACHE_ENABLED', default=False, cast=bool)
+SEMANTIC_CACHE_THRESHOLD = config('SEMANTIC_CACHE_THRESHOLD', default=0.9, cast=float)
+SEMANTIC_CACHE_CAPACITY = config('SEMANTIC_CACHE_CAPACITY', default=2000, cast=int)
+
+# Report analysis result cache, keyed on upload content, report type and model version
+REPORT_CACHE_ENABLED = config('REPORT_CACHE_ENABLED', default=True, cast=bool)
+REPORT_CACHE_SIZE = config('REPORT_CACHE_SIZE', default=512, cast=int)
+REPORT_CACHE_TTL = config('REPORT_CACHE_TTL', default=86400, cast=int)
+
+# Image report enrichment: urgency and interpretation Groq calls run
+# concurrently and share one overall deadline
+REPORT_LLM_DEADLINE_SECONDS = config('REPORT_LLM_DEADLINE_SECONDS', default=15, cast=float)
+REPORT_LLM_MAX_WORKERS = config('REPORT_LLM_MAX_WORKERS', default=8, cast=int)
+
+# Per-label urgency/display/recommendation table built by
+# `manage.py build_label_table`. REPORT_URGENCY_SOURCE=llm ignores the
+# table's urgency and asks Groq at request time.
+MEDMNIST_LABEL_TABLE_PATH = config('MEDMNIST_LABEL_TABLE_PATH', default='')
+REPORT_URGENCY_SOURCE = config('REPORT_URGENCY_SOURCE', default='table')
+
+# Text report OCR: pages from every upload (multi-frame TIFF and PDF
+# included) are OCRed in parallel on a process pool. OCR_TIMEOUT bounds the
+# whole document, OCR_PAGE_TIMEOUT each Tesseract call.
+OCR_MAX_PROCESSES = config('OCR_MAX_PROCESSES', default=2, cast=int)
+OCR_MAX_PAGES = config('OCR_MAX_PAGES', default=20, cast=int)
+OCR_TIMEOUT = config('OCR_TIMEOUT', default=60, cast=int)
+OCR_PAGE_TIMEOUT = config('OCR_PAGE_TIMEOUT', default=30, cast=int)
+OCR_MAX_SIDE = config('OCR_MAX_SIDE', default=2500, cast=int)
+OCR_PDF_DPI = config('OCR_PDF_DPI', default=200, cast=int)
+OCR_MAX_PROMPT_CHARS = config('OCR_MAX_PROMPT_CHARS', default=12000, cast=int)
+
+# Async report analysis (POST /api/reports/analyze/?async=1): local worker pool
+# size, max queued-or-running jobs per process, and SSE stream limits. An
+# open event stream holds a sync (WSGI) worker, so streams end after
+# REPORT_JOB_SSE_TIMEOUT and clients fall back to polling the status URL;
+# raise it only when serving with async/gevent workers. Jobs still unfinished
+# after REPORT_JOB_STALE_MINUTES (e.g. their worker was recycled) are marked
+# failed when polled and by `manage.py expire_report_jobs`.
+REPORT_JOB_WORKERS = config('REPORT_JOB_WORKERS', default=2, cast=int)
+REPORT_JOB_MAX_PENDING = config('REPORT_JOB_MAX_PENDING', default=32, cast=int)
+REPORT_JOB_SSE_POLL_SECONDS = config('REPORT_JOB_SSE_POLL_SECONDS', default=1.0, cast=float)
+REPORT_JOB_SSE_TIMEOUT = config('REPORT_JOB_SSE_TIMEOUT', default=25, cast=int)
+REPORT_JOB_STALE_MINUTES = config('REPORT_JOB_STALE_MINUTES', default=15, cast=int)
 
 # Email Configuration (optional)
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
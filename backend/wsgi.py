@@ -14,3 +14,10 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_wsgi_application()
+
+# Optionally load ML models before the first request instead of on first use
+from django.conf import settings
+
+if getattr(settings, 'MODEL_WARMUP', False):
+    from reports.model_registry import registry
+    registry.warmup()
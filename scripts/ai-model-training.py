@@ -119,31 +119,36 @@ def train_medical_prediction_model():
             'name': 'Common Cold',
             'description': 'Viral upper respiratory infection',
             'medications': ['Acetaminophen', 'Decongestants'],
-            'recommendations': ['Rest', 'Hydration', 'Warm liquids']
+            'recommendations': ['Rest', 'Hydration', 'Warm liquids'],
+            'urgency': 'low'
         },
         'influenza': {
             'name': 'Influenza',
             'description': 'Seasonal flu with systemic symptoms',
             'medications': ['Oseltamivir', 'Acetaminophen'],
-            'recommendations': ['Bed rest', 'Antiviral medication', 'Isolation']
+            'recommendations': ['Bed rest', 'Antiviral medication', 'Isolation'],
+            'urgency': 'medium'
         },
         'gastroenteritis': {
             'name': 'Gastroenteritis',
             'description': 'Stomach flu causing GI symptoms',
             'medications': ['Oral rehydration', 'Probiotics'],
-            'recommendations': ['BRAT diet', 'Hydration', 'Rest']
+            'recommendations': ['BRAT diet', 'Hydration', 'Rest'],
+            'urgency': 'low'
         },
         'anxiety': {
             'name': 'Anxiety Disorder',
             'description': 'Mental health condition causing physical symptoms',
             'medications': ['Anxiolytics', 'Beta-blockers'],
-            'recommendations': ['Breathing exercises', 'Therapy', 'Stress management']
+            'recommendations': ['Breathing exercises', 'Therapy', 'Stress management'],
+            'urgency': 'medium'
         },
         'migraine': {
             'name': 'Migraine',
             'description': 'Severe headache with neurological symptoms',
             'medications': ['Triptans', 'NSAIDs'],
-            'recommendations': ['Dark room', 'Cold compress', 'Avoid triggers']
+            'recommendations': ['Dark room', 'Cold compress', 'Avoid triggers'],
+            'urgency': 'medium'
         }
     }
     
@@ -0,0 +1,101 @@
+"""
+Benchmark the login hot path: legacy (inline check_password + full user.save())
+vs current (pooled hash check + atomic last_login update).
+
+Runs in one process, like a single gunicorn worker, with --threads concurrent
+login requests against the configured MongoDB. A temporary user is created
+and removed.
+
+    python scripts/benchmark-login.py --logins 200 --threads 8
+"""
+
+import argparse
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+PASSWORD = 'benchmark-Password-1'
+
+
+def legacy_login(email):
+    """The login path before the hash pool: everything on the request thread"""
+    from datetime import datetime
+    from accounts.models import UserProfile
+
+    user = UserProfile.objects(email=email).first()
+    if not user or not user.check_password(PASSWORD):
+        raise RuntimeError("login failed")
+    user.last_login = datetime.utcnow()
+    user.save()
+
+
+def current_login(email):
+    from rest_framework.test import APIRequestFactory
+    from accounts.views import login_view
+
+    request = APIRequestFactory().post('/api/auth/login/', {'email': email, 'password': PASSWORD}, format='json')
+    response = login_view(request)
+    if response.status_code != 200:
+        raise RuntimeError(f"login failed: {response.status_code}")
+
+
+def run(func, email, logins, threads):
+    latencies = []
+
+    def one(_):
+        start = time.perf_counter()
+        func(email)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    func(email)  # warm up imports and connections
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(one, range(logins)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'logins_per_sec': round(logins / elapsed, 1),
+        'p50_ms': round(latencies[len(latencies) // 2], 1),
+        'p95_ms': round(latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))], 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=8, help="concurrent requests in this worker")
+    args = parser.parse_args()
+
+    import django
+    django.setup()
+    from accounts.models import UserProfile
+
+    email = f"login-benchmark-{uuid.uuid4().hex[:8]}@example.com"
+    user = UserProfile(email=email, first_name='Login', last_name='Benchmark')
+    user.set_password(PASSWORD)
+    user.save()
+    try:
+        results = [
+            ('legacy', run(legacy_login, email, args.logins, args.threads)),
+            ('current', run(current_login, email, args.logins, args.threads)),
+        ]
+    finally:
+        user.delete()
+
+    print(f"{'path':<10}{'logins/s':>12}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, result in results:
+        print(f"{name:<10}{result['logins_per_sec']:>12}{result['p50_ms']:>10}{result['p95_ms']:>10}")
+    legacy_result, current_result = results[0][1], results[1][1]
+    if legacy_result['logins_per_sec']:
+        print(f"speedup: {current_result['logins_per_sec'] / legacy_result['logins_per_sec']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark report image preprocessing: legacy path vs low-copy pipeline.
+
+Each path runs in its own subprocess so peak RSS is measured independently.
+
+    python scripts/benchmark-preprocessing.py                 # synthetic 12 MP phone photo
+    python scripts/benchmark-preprocessing.py scan1.jpg scan2.png --repeat 50
+"""
+
+import argparse
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+
+def synthetic_photo(width=4032, height=3024):
+    """Noisy colour JPEG roughly the size of a phone camera upload"""
+    import numpy as np
+    from PIL import Image
+
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format='JPEG', quality=92)
+    return buffer.getvalue()
+
+
+def legacy(data):
+    from PIL import Image
+    from torchvision import transforms
+
+    image = Image.open(io.BytesIO(data)).convert('RGB')
+    img = image.convert("L").resize((224, 224))
+    return transforms.ToTensor()(img).unsqueeze(0)
+
+
+def pipeline(data):
+    from reports.preprocessing import preprocess_batch
+
+    with preprocess_batch([io.BytesIO(data)]) as batch:
+        return batch.sum()
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_worker(mode, paths, repeat):
+    import torch  # noqa: F401  (import cost excluded from the measurement)
+    from PIL import Image  # noqa: F401
+
+    payloads = [open(path, 'rb').read() for path in paths] if paths else [synthetic_photo()]
+    func = legacy if mode == 'legacy' else pipeline
+
+    func(payloads[0])  # warm up imports and allocator
+    baseline = peak_rss_mb()
+
+    start = time.perf_counter()
+    count = 0
+    for _ in range(repeat):
+        for data in payloads:
+            func(data)
+            count += 1
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        'mode': mode,
+        'images': count,
+        'ms_per_image': round(elapsed / count * 1000, 2),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'baseline_rss_mb': round(baseline, 1),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('paths', nargs='*', help="images to benchmark (default: synthetic 12 MP JPEG)")
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--worker', choices=['legacy', 'pipeline'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.paths, args.repeat)
+        return
+
+    results = []
+    for mode in ('legacy', 'pipeline'):
+        output = subprocess.check_output(
+            [sys.executable, __file__, '--worker', mode, '--repeat', str(args.repeat), *args.paths]
+        )
+        results.append(json.loads(output.decode().strip().splitlines()[-1]))
+
+    print(f"{'path':<10}{'ms/image':>12}{'peak RSS MB':>14}")
+    for result in results:
+        print(f"{result['mode']:<10}{result['ms_per_image']:>12}{result['peak_rss_mb']:>14}")
+    legacy_result, pipeline_result = results
+    if pipeline_result['ms_per_image']:
+        print(f"speedup: {legacy_result['ms_per_image'] / pipeline_result['ms_per_image']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()